@@ -0,0 +1,178 @@
+"""Histórico de revisões e estatísticas acumuladas entre sessões.
+
+Cada revisão é acrescentada ao log (tabela reviews) e, na mesma transação,
+soma-se aos agregados por card, por dia e por tempo desde a revisão anterior
+(curva de retenção). O painel lê apenas os agregados, então continua instantâneo
+com milhões de revisões no log.
+
+Os dados ficam em SQLite (FLASHCARDS_ANALYTICS_DB, padrão flashcards_analytics.db),
+independente do backend de progresso.
+"""
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+from constants import DEFAULT_USER
+
+# O pandas só é usado nas consultas do painel; gravar revisões não o importa
+if TYPE_CHECKING:
+    import pandas as pd
+
+ANALYTICS_PATH = os.environ.get("FLASHCARDS_ANALYTICS_DB", "flashcards_analytics.db")
+
+# Dias exibidos no gráfico de revisões por dia
+DAILY_HISTORY_DAYS = 30
+
+# Revisões mínimas para um card entrar no ranking dos mais difíceis
+MIN_REVIEWS_FOR_RANKING = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    user TEXT NOT NULL,
+    card_id INTEGER NOT NULL,
+    reviewed_at TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    elapsed_days INTEGER,
+    interval INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS card_stats (
+    user TEXT NOT NULL,
+    card_id INTEGER NOT NULL,
+    reviews INTEGER NOT NULL,
+    easy INTEGER NOT NULL,
+    medium INTEGER NOT NULL,
+    hard INTEGER NOT NULL,
+    last_reviewed TEXT NOT NULL,
+    PRIMARY KEY (user, card_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_stats (
+    user TEXT NOT NULL,
+    day TEXT NOT NULL,
+    reviews INTEGER NOT NULL,
+    easy INTEGER NOT NULL,
+    medium INTEGER NOT NULL,
+    hard INTEGER NOT NULL,
+    PRIMARY KEY (user, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS retention_stats (
+    user TEXT NOT NULL,
+    elapsed_bucket INTEGER NOT NULL,
+    reviews INTEGER NOT NULL,
+    recalled INTEGER NOT NULL,
+    PRIMARY KEY (user, elapsed_bucket)
+) WITHOUT ROWID;
+"""
+
+_COUNTS = "reviews = reviews + excluded.reviews, easy = easy + excluded.easy, medium = medium + excluded.medium, hard = hard + excluded.hard"
+
+
+def elapsed_bucket(elapsed_days: int) -> int:
+    """Faixa da curva de retenção: 0, 1, 2, 4, 8, ... dias desde a revisão anterior"""
+    return 0 if elapsed_days < 1 else 1 << (elapsed_days.bit_length() - 1)
+
+
+def review_event(card_id: int, difficulty: str, reviewed_at: datetime, last_reviewed, interval: int) -> tuple:
+    """Uma revisão do log; last_reviewed é None para um card nunca revisado"""
+    elapsed_days = None if last_reviewed is None else max(0, (reviewed_at - last_reviewed).days)
+    return int(card_id), difficulty, reviewed_at, elapsed_days, int(interval)
+
+
+class ReviewHistory:
+    """Log de revisões com agregados atualizados incrementalmente"""
+
+    def __init__(self, path: str = ANALYTICS_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def record(self, events: list, user: str = DEFAULT_USER):
+        """Acrescenta revisões ao log e soma cada uma aos agregados, em uma única transação"""
+        card_rows, daily_rows, retention_rows, review_rows = [], [], [], []
+        for card_id, difficulty, reviewed_at, elapsed_days, interval in events:
+            counts = (int(difficulty == "easy"), int(difficulty == "medium"), int(difficulty == "hard"))
+            reviewed_iso = reviewed_at.isoformat()
+            review_rows.append((user, card_id, reviewed_iso, difficulty, elapsed_days, interval))
+            card_rows.append((user, card_id, 1, *counts, reviewed_iso))
+            daily_rows.append((user, reviewed_at.date().isoformat(), 1, *counts))
+            if elapsed_days is not None:
+                retention_rows.append((user, elapsed_bucket(elapsed_days), 1, int(difficulty != "hard")))
+
+        conn = self._connection()
+        with conn:
+            conn.executemany("INSERT INTO reviews VALUES (?, ?, ?, ?, ?, ?)", review_rows)
+            conn.executemany(
+                f"""INSERT INTO card_stats VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (user, card_id) DO UPDATE SET {_COUNTS},
+                    last_reviewed = max(last_reviewed, excluded.last_reviewed)""",
+                card_rows,
+            )
+            conn.executemany(
+                f"INSERT INTO daily_stats VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (user, day) DO UPDATE SET {_COUNTS}",
+                daily_rows,
+            )
+            conn.executemany(
+                """INSERT INTO retention_stats VALUES (?, ?, ?, ?)
+                ON CONFLICT (user, elapsed_bucket) DO UPDATE SET
+                    reviews = reviews + excluded.reviews, recalled = recalled + excluded.recalled""",
+                retention_rows,
+            )
+
+    def _query(self, sql: str, params: tuple) -> "pd.DataFrame":
+        import pandas as pd
+
+        return pd.read_sql_query(sql, self._connection(), params=params)
+
+    def daily_stats(self, user: str = DEFAULT_USER, days: int = DAILY_HISTORY_DAYS) -> "pd.DataFrame":
+        """Volume de revisões por dia, nos últimos `days` dias com revisões"""
+        daily_df = self._query(
+            "SELECT day, reviews, easy, medium, hard FROM daily_stats WHERE user = ? ORDER BY day DESC LIMIT ?",
+            (user, days),
+        )
+        return daily_df.iloc[::-1].reset_index(drop=True)
+
+    def retention(self, user: str = DEFAULT_USER) -> "pd.DataFrame":
+        """Fração de cards lembrados (não difíceis) por dias desde a revisão anterior"""
+        return self._query(
+            "SELECT elapsed_bucket AS elapsed_days, reviews, CAST(recalled AS REAL) / reviews AS retention "
+            "FROM retention_stats WHERE user = ? ORDER BY elapsed_bucket",
+            (user,),
+        )
+
+    def hardest_cards(self, user: str = DEFAULT_USER, limit: int = 10) -> "pd.DataFrame":
+        return self._query(
+            "SELECT card_id, reviews, hard, CAST(hard AS REAL) / reviews AS hard_rate FROM card_stats "
+            "WHERE user = ? AND reviews >= ? ORDER BY hard_rate DESC, reviews DESC LIMIT ?",
+            (user, MIN_REVIEWS_FOR_RANKING, limit),
+        )
+
+    def totals(self, user: str = DEFAULT_USER) -> dict:
+        reviews, hard, cards = self._connection().execute(
+            "SELECT coalesce(sum(reviews), 0), coalesce(sum(hard), 0), count(*) FROM card_stats WHERE user = ?",
+            (user,),
+        ).fetchone()
+        return {"reviews": reviews, "hard": hard, "cards": cards}
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_review_history() -> ReviewHistory:
+    global _history
+    with _history_lock:
+        if _history is None:
+            _history = ReviewHistory(ANALYTICS_PATH)
+        return _history
@@ -0,0 +1,196 @@
+"""Micro-benchmarks das funções críticas de utils em decks sintéticos.
+
+    python benchmarks/bench_utils.py --sizes 84 10000 100000 --output resultado.json
+    python benchmarks/bench_utils.py --baseline resultado.json
+
+Para cada tamanho de deck e operação são medidos o tempo de parede (mínimo e
+mediana de --repeat execuções) e o pico de memória alocada (tracemalloc, em uma
+execução separada para não distorcer o tempo). As cargas são medidas a frio,
+sem os snapshots binários (como no primeiro acesso depois de mudar o CSV), e a
+quente, lendo os snapshots; com FLASHCARDS_SNAPSHOTS=0 só a medição a frio é
+feita. O resultado é um JSON; com --baseline, operações mais lentas que o limite (--threshold) são listadas e o
+processo termina com código 1.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit import logger as st_logger  # noqa: E402
+
+st_logger.set_log_level("error")
+
+import streamlit as st  # noqa: E402
+
+import deck_snapshot  # noqa: E402
+import storage  # noqa: E402
+import utils  # noqa: E402
+from generate_deck import generate_deck  # noqa: E402
+
+DEFAULT_SIZES = [84, 1_000, 10_000, 100_000]
+SEARCH_QUERIES = ["agua", "extintor portatil", "hidrnte", "porta corta fogo", "de"]
+
+# Chamadas por medição das operações rápidas demais para medir uma única vez
+NEXT_QUESTION_CALLS = 1_000
+
+
+def _reset_state():
+    # Cada tamanho de deck começa sem caches, sessão ou backend de armazenamento anteriores
+    st.cache_resource.clear()
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    storage._storage = None
+
+
+def _clear_snapshots():
+    shutil.rmtree(deck_snapshot.SNAPSHOT_DIR, ignore_errors=True)
+
+
+def _measure(fn, repeat: int, setup=None) -> dict:
+    # setup() roda antes de cada execução, fora do tempo medido
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    if setup is not None:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"wall_min_s": min(times), "wall_median_s": statistics.median(times), "peak_bytes": peak}
+
+
+def _operations() -> list:
+    """Tuplas (nome, função, chamadas por medição, preparação) na ordem em que são medidas"""
+    saved_df = utils.load_all_flashcards()
+
+    def session_load():
+        st.cache_resource.clear()
+        utils.load_session_flashcards()
+
+    def next_questions():
+        for _ in range(NEXT_QUESTION_CALLS):
+            utils.get_next_question()
+
+    def search_index_build():
+        utils._shared_search_index.clear()
+        utils.get_search_index()
+
+    def search_queries():
+        index = utils.get_search_index()
+        for query in SEARCH_QUERIES:
+            index.search(query)
+
+    # A frio os snapshots são apagados antes de cada carga; a quente já existem
+    loads = [
+        ("load_all_flashcards_cold", utils.load_all_flashcards, 1, _clear_snapshots),
+        ("load_session_flashcards_cold", session_load, 1, _clear_snapshots),
+    ]
+    if deck_snapshot.SNAPSHOTS_ENABLED:
+        loads += [
+            ("load_all_flashcards", utils.load_all_flashcards, 1, utils.load_all_flashcards),
+            ("load_session_flashcards", session_load, 1, utils.load_all_flashcards),
+        ]
+    return loads + [
+        ("save_flashcards", lambda: utils.save_flashcards(saved_df), 1, None),
+        ("initialize_question_queue", utils.initialize_question_queue, 1, None),
+        ("get_next_question", next_questions, NEXT_QUESTION_CALLS, None),
+        ("search_index_build", search_index_build, 1, None),
+        ("search", search_queries, len(SEARCH_QUERIES), None),
+    ]
+
+
+def run(sizes: list, repeat: int) -> dict:
+    results = []
+    cwd = os.getcwd()
+    for n_cards in sizes:
+        with tempfile.TemporaryDirectory(prefix="flashcards-bench-") as directory:
+            generate_deck(directory, n_cards)
+            os.chdir(directory)
+            try:
+                _reset_state()
+                # Mensagens de depuração de utils não devem poluir a saída JSON
+                with contextlib.redirect_stdout(io.StringIO()):
+                    utils.load_session_flashcards()
+                    utils.initialize_question_queue()
+                    for name, fn, calls, setup in _operations():
+                        measured = _measure(fn, repeat, setup)
+                        measured["wall_per_call_s"] = measured["wall_min_s"] / calls
+                        results.append({"operation": name, "cards": n_cards, "calls": calls, **measured})
+                        print(f"{name:28} {n_cards:>9} cards  {measured['wall_min_s'] * 1000:10.2f} ms", file=sys.stderr)
+            finally:
+                os.chdir(cwd)
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "snapshots": deck_snapshot.SNAPSHOTS_ENABLED,
+        },
+        "results": results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """Operações cujo tempo mínimo piorou mais que `threshold` (0.2 = 20%) em relação ao baseline"""
+    previous = {(r["operation"], r["cards"]): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get((result["operation"], result["cards"]))
+        if old is None or old["wall_min_s"] == 0:
+            continue
+        ratio = result["wall_min_s"] / old["wall_min_s"]
+        if ratio > 1 + threshold:
+            regressions.append({"operation": result["operation"], "cards": result["cards"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="tamanhos de deck (até 1000000)")
+    parser.add_argument("--repeat", type=int, default=3, help="execuções cronometradas por operação")
+    parser.add_argument("--output", default="-", help="arquivo JSON de saída ('-' para stdout)")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--threshold", type=float, default=0.2, help="piora relativa tolerada (padrão 0.2)")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeat)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f), args.threshold)
+
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+    if report.get("regressions"):
+        for regression in report["regressions"]:
+            print(f"Regressão: {regression['operation']} ({regression['cards']} cards) x{regression['ratio']}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Gera um deck sintético (database.csv, progresso e imagens) para os benchmarks.
+
+    python benchmarks/generate_deck.py 100000 /tmp/deck
+"""
+import csv
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+from PIL import Image, ImageDraw
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from constants import DATABASE_CSV, FLASHCARDS_SYMBOLS_CSV  # noqa: E402
+from storage import PROGRESS_COLUMNS  # noqa: E402
+
+# Quantidade de imagens distintas; os cards reutilizam as imagens em ciclo
+N_IMAGES = 100
+
+
+def _vocabulary() -> list:
+    # Palavras das respostas reais, para que a busca se comporte como no deck original
+    with open(os.path.join(ROOT, DATABASE_CSV), newline="") as f:
+        answers = [row["answer"] for row in csv.DictReader(f)]
+    return sorted({word for answer in answers for word in answer.split()})
+
+
+def generate_images(directory: str, count: int = N_IMAGES) -> list:
+    """Cria imagens PNG simples no tamanho aproximado dos símbolos"""
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(count)
+    paths = []
+    for n in range(count):
+        path = os.path.join(directory, f"{n + 1}_sintetico.png")
+        image = Image.new("RGBA", (rng.randint(80, 340), rng.randint(60, 140)), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        color = tuple(rng.randint(0, 255) for _ in range(3)) + (255,)
+        draw.rectangle((4, 4, image.width - 5, image.height - 5), outline=color, width=4)
+        draw.text((10, image.height // 2 - 5), f"#{n + 1}", fill=color)
+        image.save(path)
+        paths.append(path)
+    return paths
+
+
+def generate_deck(directory: str, n_cards: int, progress_fraction: float = 0.5, seed: int = 0):
+    """Escreve database.csv e o snapshot de progresso com n_cards cards em `directory`.
+
+    Uma fração dos cards recebe progresso salvo, e parte das linhas de progresso
+    aponta para IDs que não existem mais no deck, como acontece após edições.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    images = [os.path.relpath(path, directory) for path in generate_images(os.path.join(directory, "images"))]
+    words = _vocabulary()
+
+    with open(os.path.join(directory, DATABASE_CSV), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["question", "answer"])
+        for n in range(n_cards):
+            answer = " ".join(rng.choices(words, k=rng.randint(1, 6)))
+            writer.writerow([images[n % len(images)], f"{answer} {n + 1}"])
+
+    now = datetime.now()
+    with open(os.path.join(directory, FLASHCARDS_SYMBOLS_CSV), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(PROGRESS_COLUMNS)
+        n_progress = int(n_cards * progress_fraction)
+        for card_id in rng.sample(range(1, int(n_cards * 1.05) + 2), n_progress):
+            # Última revisão entre ontem e um ano atrás; parte dos cards já venceu
+            last_review = now - timedelta(days=rng.randint(1, 365))
+            interval = rng.randint(1, 60)
+            writer.writerow(
+                [
+                    card_id,
+                    last_review - timedelta(days=rng.randint(0, 365)),
+                    last_review + timedelta(days=interval),
+                    round(rng.uniform(1.3, 3.0), 2),
+                    interval,
+                    rng.randint(1, 10),
+                ]
+            )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    generate_deck(sys.argv[2], int(sys.argv[1]))
@@ -0,0 +1,188 @@
+"""Teste de carga do main.py com várias sessões simultâneas (Streamlit AppTest).
+
+    python benchmarks/load_test.py --sessions 50 --storage sqlite --output carga.json
+
+Cada sessão simulada roda em um processo (--workers limita quantos existem ao
+mesmo tempo; as demais sessões esperam na fila). A sessão revela a resposta, responde
+Fácil/Médio/Difícil até terminar a sessão e então faz a rodada "apenas
+difíceis". São medidos a latência de cada rerun (p50/p95/p99), a vazão de
+reruns por segundo e, ao final, quantas revisões gravadas se perderam ou foram
+sobrescritas no armazenamento de progresso.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MAIN_SCRIPT = os.path.join(ROOT, "main.py")
+GRADE_LABELS = {"😊 Fácil", "😐 Médio", "😰 Difícil"}
+
+
+def _prepare_workdir(directory: str, deck_size: int):
+    """Copia os arquivos que o main.py lê do diretório atual, ou gera um deck sintético"""
+    shutil.copy(os.path.join(ROOT, "style.css"), directory)
+    if deck_size:
+        from generate_deck import generate_deck
+
+        generate_deck(directory, deck_size, progress_fraction=0)
+    else:
+        shutil.copy(os.path.join(ROOT, "database.csv"), directory)
+        shutil.copytree(os.path.join(ROOT, "images"), os.path.join(directory, "images"))
+
+
+def _answer_until_done(at, latencies: list, writes: list, user: str, rng: random.Random):
+    from constants import NEXT_APPEARANCE
+
+    while True:
+        grade_buttons = [button for button in at.button if button.label in GRADE_LABELS]
+        if not grade_buttons:
+            return
+        start = time.perf_counter()
+        at.button(key="toggle_answer").click().run()
+        latencies.append(time.perf_counter() - start)
+
+        card_id = int(at.session_state["current_question_id"])
+        grade_buttons = [button for button in at.button if button.label in GRADE_LABELS]
+        start = time.perf_counter()
+        rng.choice(grade_buttons).click().run()
+        latencies.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+
+        position = at.session_state["card_index"][card_id]
+        progress = at.session_state["schedule"].get(position)
+        writes.append((user, card_id, progress[NEXT_APPEARANCE].isoformat(), time.time()))
+
+
+def run_session(args: tuple) -> dict:
+    """Roda uma sessão completa e devolve as latências e as revisões gravadas"""
+    session_number, workdir, shared_user, start_at = args
+    os.chdir(workdir)
+    # Mensagens de depuração do app não devem poluir a saída JSON
+    sys.stdout = open(os.devnull, "w")
+    from streamlit import logger as st_logger
+
+    st_logger.set_log_level("error")
+    from streamlit.testing.v1 import AppTest
+
+    user = "default" if shared_user else f"carga-{session_number}"
+    rng = random.Random(session_number)
+    latencies = []
+    writes = []
+
+    # Todas as sessões começam juntas, para que a concorrência seja real
+    time.sleep(max(0.0, start_at - time.time()))
+    at = AppTest.from_file(MAIN_SCRIPT, default_timeout=120)
+    at.query_params["user"] = user
+    start = time.perf_counter()
+    at.run()
+    latencies.append(time.perf_counter() - start)
+
+    _answer_until_done(at, latencies, writes, user, rng)
+    hard_only = [button for button in at.button if button.key == "hard_only_btn"]
+    if hard_only:
+        start = time.perf_counter()
+        hard_only[0].click().run()
+        latencies.append(time.perf_counter() - start)
+        # Repetições no mesmo dia não alteram o agendamento: não há gravações a conferir
+        _answer_until_done(at, latencies, [], user, rng)
+
+    return {"latencies": latencies, "writes": writes, "finished": time.time()}
+
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def check_writes(workdir: str, writes: list) -> dict:
+    """Compara a última revisão de cada (usuário, card) com o que ficou armazenado"""
+    os.chdir(workdir)
+    from constants import ID, NEXT_APPEARANCE
+    from storage import get_storage
+
+    expected = {}
+    for user, card_id, next_appearance, written_at in sorted(writes, key=lambda write: write[3]):
+        expected[(user, card_id)] = next_appearance
+
+    lost = 0
+    clobbered = 0
+    stored_by_user = {}
+    for (user, card_id), next_appearance in expected.items():
+        if user not in stored_by_user:
+            progress_df = get_storage().load_progress(user)
+            stored_by_user[user] = {
+                int(row_id): value.isoformat() for row_id, value in zip(progress_df[ID], progress_df[NEXT_APPEARANCE])
+            }
+        stored = stored_by_user[user].get(card_id)
+        if stored is None:
+            lost += 1
+        elif stored != next_appearance:
+            clobbered += 1
+    return {"expected_writes": len(expected), "lost_writes": lost, "clobbered_writes": clobbered}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=10, help="sessões simultâneas")
+    parser.add_argument("--workers", type=int, help="processos simultâneos (padrão: um por sessão)")
+    parser.add_argument("--storage", choices=["csv", "sqlite"], default="csv", help="backend de progresso")
+    parser.add_argument("--shared-user", action="store_true", help="todas as sessões usam o mesmo usuário")
+    parser.add_argument("--deck-size", type=int, default=0, help="usar um deck sintético com N cards")
+    parser.add_argument("--output", default="-", help="arquivo JSON de saída ('-' para stdout)")
+    args = parser.parse_args()
+
+    os.environ["FLASHCARDS_STORAGE"] = args.storage
+    with tempfile.TemporaryDirectory(prefix="flashcards-load-") as workdir:
+        _prepare_workdir(workdir, args.deck_size)
+        # Margem para os processos importarem o Streamlit antes do início combinado
+        start_at = time.time() + 5
+        jobs = [(n, workdir, args.shared_user, start_at) for n in range(args.sessions)]
+        with multiprocessing.get_context("spawn").Pool(args.workers or args.sessions) as pool:
+            sessions = pool.map(run_session, jobs)
+        elapsed = max(session["finished"] for session in sessions) - start_at
+
+        latencies = [latency for session in sessions for latency in session["latencies"]]
+        writes = [write for session in sessions for write in session["writes"]]
+        report = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(),
+                "sessions": args.sessions,
+                "storage": args.storage,
+                "shared_user": args.shared_user,
+                "deck_size": args.deck_size or "database.csv",
+            },
+            "reruns": len(latencies),
+            "elapsed_s": elapsed,
+            "throughput_reruns_per_s": len(latencies) / elapsed,
+            "latency_s": {
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "p99": _percentile(latencies, 99),
+                "mean": statistics.mean(latencies),
+                "max": max(latencies),
+            },
+            **check_writes(workdir, writes),
+        }
+        os.chdir(ROOT)
+
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Revisão e agendamento pelo terminal, sem Streamlit e sem pandas.
+
+    python cli.py review --user ana --deck flashcards
+    python cli.py grade respostas.csv --user ana
+    python cli.py due ana bruno carla --all-decks
+    cut -f1 alunos.tsv | python cli.py due -
+
+Usa os mesmos decks, backend de progresso (FLASHCARDS_STORAGE), regras SM-2,
+limite diário e histórico de revisões do app, então o que é revisado aqui aparece
+no navegador e vice-versa.
+
+- review: revisão interativa dos cards vencidos, como no app.
+- grade: aplica respostas em lote, uma por linha ("id,easy|medium|hard"), de um
+  arquivo ou da entrada padrão; o limite diário vale só para a fila, não para
+  respostas explícitas.
+- due: uma linha JSON por usuário e deck com cards vencidos, tamanho da fila de
+  hoje e próxima revisão, para jobs agendados (cron) com muitos usuários.
+"""
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime
+
+from analytics import get_review_history, review_event
+from constants import ANSWER, DEFAULT_USER, ID, INTERVAL, NEXT_APPEARANCE, QUESTION, TAGS
+from decks import DECKS, DEFAULT_DECK, check_user, progress_key, read_cards, split_tags
+from scheduler import (
+    DAILY_REVIEW_LIMIT,
+    QUALITY,
+    ReviewQueue,
+    apply_review,
+    last_reviewed,
+    new_card_progress,
+    next_serving_date,
+)
+from storage import encode_user, get_storage
+
+# Teclas das respostas na revisão interativa
+ANSWER_KEYS = {"f": "easy", "m": "medium", "d": "hard"}
+DIFFICULTY_LABELS = {"easy": "😊 Fácil", "medium": "😐 Médio", "hard": "😰 Difícil"}
+
+
+def load_schedule(cards: list, user: str, deck_name: str, now: datetime) -> dict:
+    """Progresso de cada card do deck ({id: progresso}); cards sem progresso começam vencidos"""
+    saved = get_storage().load_records(progress_key(user, deck_name))
+    new_card = new_card_progress(now)
+    return {card[ID]: saved.get(card[ID], new_card) for card in cards}
+
+
+def count_reviewed_today(schedule: dict, now: datetime) -> int:
+    """Quantos cards já foram revisados hoje (próxima aparição menos o intervalo)"""
+    today = now.date()
+    reviewed_days = (last_reviewed(progress) for progress in schedule.values())
+    return sum(1 for reviewed in reviewed_days if reviewed is not None and reviewed.date() == today)
+
+
+def due_queue(cards: list, schedule: dict, now: datetime, tags: set = None) -> ReviewQueue:
+    """Fila dos cards vencidos, até o que resta do limite diário; com `tags`, só cards com essas tags"""
+    limit = max(0, DAILY_REVIEW_LIMIT - count_reviewed_today(schedule, now))
+    if tags:
+        cards = [card for card in cards if tags.intersection(split_tags(card[TAGS]))]
+    card_ids = [card[ID] for card in cards]
+    return ReviewQueue.due(card_ids, [schedule[card_id][NEXT_APPEARANCE] for card_id in card_ids], now, limit)
+
+
+def record_reviews(reviews: dict, events: list, key: str):
+    """Grava o progresso ({id: progresso}) e os eventos do histórico na hora, sem write-behind"""
+    get_storage().record_reviews(reviews, key)
+    get_review_history().record(events, key)
+
+
+def grade(schedule: dict, card_id: int, difficulty: str, now: datetime) -> tuple:
+    """Aplica uma resposta ao agendamento e retorna (progresso novo, evento do histórico)"""
+    progress = apply_review(schedule[card_id], difficulty, now)
+    event = review_event(card_id, difficulty, now, last_reviewed(schedule[card_id]), progress[INTERVAL])
+    schedule[card_id] = progress
+    return progress, event
+
+
+def _ask(prompt: str):
+    try:
+        return input(prompt).strip().lower()
+    except EOFError:
+        return None
+
+
+def run_review(user: str, deck_name: str, tags: set = None) -> dict:
+    """Revisão interativa dos cards vencidos; retorna as contagens por dificuldade"""
+    deck = DECKS[deck_name]
+    now = datetime.now()
+    cards = read_cards(deck)
+    cards_by_id = {card[ID]: card for card in cards}
+    schedule = load_schedule(cards, user, deck.name, now)
+    queue = due_queue(cards, schedule, now, tags)
+    key = progress_key(user, deck.name)
+    counts = dict.fromkeys(QUALITY, 0)
+
+    print(f"🔥 Revisão: {deck.title} ({len(queue)} cards)")
+    if not len(queue):
+        print("🎉 Nenhum card para revisar agora!")
+    while len(queue):
+        card = cards_by_id[queue.peek()]
+        print()
+        print(f"Imagem: {card[QUESTION]}" if deck.images else card[QUESTION])
+        if _ask("Enter mostra a resposta (s para sair) ") in ("s", None):
+            break
+        print(f"Resposta: {card[ANSWER]}")
+        choice = ""
+        while choice not in (*ANSWER_KEYS, "s", None):
+            choice = _ask("[f]ácil, [m]édio, [d]ifícil ou [s]air: ")
+        if choice in ("s", None):
+            break
+        difficulty = ANSWER_KEYS[choice]
+        progress, event = grade(schedule, card[ID], difficulty, datetime.now())
+        record_reviews({card[ID]: progress}, [event], key)
+        queue.pop()
+        counts[difficulty] += 1
+        print(f"A próxima aparição deste card será em {progress[NEXT_APPEARANCE].strftime('%d-%m-%Y')}!")
+
+    print()
+    print(", ".join(f"{DIFFICULTY_LABELS[difficulty]}: {count}" for difficulty, count in counts.items()))
+    if schedule:
+        now = datetime.now()
+        next_due = min(progress[NEXT_APPEARANCE] for progress in schedule.values())
+        next_due = next_serving_date(next_due, count_reviewed_today(schedule, now), now)
+        print(f"A próxima revisão será em {next_due.strftime('%d-%m-%Y')}.")
+    return counts
+
+
+def run_grade(lines, user: str, deck_name: str) -> dict:
+    """Aplica respostas "id,dificuldade" em lote e as grava em uma única escrita"""
+    deck = DECKS[deck_name]
+    now = datetime.now()
+    cards = read_cards(deck)
+    schedule = load_schedule(cards, user, deck.name, now)
+    reviews, events = {}, []
+    counts = {**dict.fromkeys(QUALITY, 0), "invalid": 0}
+    for row in csv.reader(lines):
+        if not row or row[0].strip().lower() == ID:
+            continue
+        try:
+            card_id, difficulty = int(row[0]), row[1].strip().lower()
+        except (ValueError, IndexError):
+            card_id, difficulty = None, None
+        if card_id not in schedule or difficulty not in QUALITY:
+            counts["invalid"] += 1
+            print(f"Linha ignorada: {','.join(row)}", file=sys.stderr)
+            continue
+        progress, event = grade(schedule, card_id, difficulty, now)
+        # Respostas repetidas do mesmo card se acumulam, como no app
+        reviews[card_id] = progress
+        events.append(event)
+        counts[difficulty] += 1
+    if reviews:
+        record_reviews(reviews, events, progress_key(user, deck.name))
+    return counts
+
+
+def due_report(users, deck_names: list):
+    """Gera, para cada usuário e deck, os cards vencidos, a fila de hoje e a próxima revisão"""
+    now = datetime.now()
+    # Cada deck é lido uma única vez para todos os usuários
+    decks_cards = [(deck_name, read_cards(DECKS[deck_name])) for deck_name in deck_names]
+    for user in users:
+        try:
+            encode_user(check_user(user))
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            continue
+        for deck_name, cards in decks_cards:
+            schedule = load_schedule(cards, user, deck_name, now)
+            reviewed_today = count_reviewed_today(schedule, now)
+            next_due = min((progress[NEXT_APPEARANCE] for progress in schedule.values()), default=None)
+            if next_due is not None:
+                next_due = next_serving_date(next_due, reviewed_today, now)
+            yield {
+                "user": user,
+                "deck": deck_name,
+                "cards": len(cards),
+                "due": sum(1 for progress in schedule.values() if progress[NEXT_APPEARANCE] <= now),
+                "queue": len(due_queue(cards, schedule, now)),
+                "reviewed_today": reviewed_today,
+                "next_review": next_due.isoformat() if next_due is not None else None,
+            }
+
+
+def _user_arg(user: str) -> str:
+    try:
+        encode_user(check_user(user))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+    return user
+
+
+def _users(names: list):
+    # "-" lê um usuário por linha da entrada padrão
+    for name in names or [DEFAULT_USER]:
+        if name == "-":
+            yield from (line.strip() for line in sys.stdin if line.strip())
+        else:
+            yield name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    review_parser = commands.add_parser("review", help="revisão interativa dos cards vencidos")
+    grade_parser = commands.add_parser("grade", help="aplica respostas em lote (id,dificuldade)")
+    grade_parser.add_argument("input", nargs="?", default="-", help="arquivo de respostas (padrão: entrada padrão)")
+    for command_parser in (review_parser, grade_parser):
+        command_parser.add_argument("--user", type=_user_arg, default=DEFAULT_USER, help="usuário (padrão: default)")
+        command_parser.add_argument("--deck", choices=list(DECKS), default=DEFAULT_DECK)
+    review_parser.add_argument("--tags", help="revisa só cards com estas tags (separadas por vírgula)")
+
+    due_parser = commands.add_parser("due", help="relatório JSON de cards vencidos por usuário")
+    due_parser.add_argument("users", nargs="*", help='usuários ("-" lê um por linha da entrada padrão)')
+    due_parser.add_argument("--deck", choices=list(DECKS), default=DEFAULT_DECK)
+    due_parser.add_argument("--all-decks", action="store_true", help="inclui todos os decks")
+    args = parser.parse_args()
+
+    if args.command == "review":
+        run_review(args.user, args.deck, set(split_tags(args.tags)) or None)
+    elif args.command == "grade":
+        if args.input == "-":
+            counts = run_grade(sys.stdin, args.user, args.deck)
+        else:
+            with open(args.input, newline="", encoding="utf-8") as f:
+                counts = run_grade(f, args.user, args.deck)
+        print(
+            f"{counts['easy']} fáceis, {counts['medium']} médias e {counts['hard']} difíceis gravadas; "
+            f"{counts['invalid']} linhas ignoradas"
+        )
+    else:
+        deck_names = list(DECKS) if args.all_decks else [args.deck]
+        for line in due_report(_users(args.users), deck_names):
+            print(json.dumps(line, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
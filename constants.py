@@ -0,0 +1,18 @@
+DATABASE_CSV = "database.csv"
+FLASHCARDS_CSV = "flashcards.csv"
+FLASHCARDS_SYMBOLS_CSV = "flashcards_symbols.csv"
+FLASHCARDS_JOURNAL = "flashcards_symbols.journal"
+FLASHCARDS_DB = "flashcards.db"
+
+ID = "id"
+QUESTION = "question"
+ANSWER = "answer"
+DATE_ADDED = "date_added"
+NEXT_APPEARANCE = "next_appearance"
+TAGS = "tags"
+EASE = "ease"
+INTERVAL = "interval"
+REPETITIONS = "repetitions"
+
+# Usuário usado quando a sessão não informa ?user= na URL
+DEFAULT_USER = "default"
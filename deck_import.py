@@ -0,0 +1,260 @@
+"""Importação em lote de cards a partir de um CSV ou de um ZIP de imagens.
+
+    python deck_import.py novos.csv
+    python deck_import.py simbolos.zip --workers 8
+
+O CSV de entrada tem as colunas question (caminho da imagem, relativo ao CSV) e
+answer. Um ZIP pode trazer um CSV assim (com caminhos dentro do ZIP) ou apenas
+imagens; nesse caso a resposta vem do nome do arquivo ("12_protecao_total.png"
+vira "Protecao total").
+
+As imagens são validadas e decodificadas em um pool de processos e gravadas em
+images/<hash>.<formato>; imagens com o mesmo conteúdo de um card já existente
+(ou repetidas na entrada) são ignoradas. Cada card novo recebe o próximo ID
+livre, gravado na coluna id de database.csv, e os cards são acrescentados ao
+deck lote a lote, com um número limitado de lotes em andamento, em uma cópia
+temporária que só substitui o deck no final.
+"""
+import argparse
+import csv
+import hashlib
+import io
+import os
+import re
+import shutil
+import sys
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from PIL import Image
+
+from constants import ANSWER, DATABASE_CSV, ID, QUESTION
+
+IMAGES_DIR = "images"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp")
+
+# Cards por tarefa enviada ao pool e lotes em andamento por processo
+IMPORT_BATCH_SIZE = int(os.environ.get("FLASHCARDS_IMPORT_BATCH", 256))
+BATCHES_IN_FLIGHT_PER_WORKER = 2
+
+DECK_COLUMNS = [QUESTION, ANSWER, ID]
+
+# ZIPs já abertos em cada processo do pool
+_open_archives = {}
+
+# Hashes das imagens que o deck já tem, copiados para cada processo do pool
+_known_hashes = frozenset()
+
+
+def _init_worker(known_hashes: frozenset):
+    global _known_hashes
+    _known_hashes = known_hashes
+
+
+def _read_source(source: tuple) -> bytes:
+    """Lê a imagem de ("file", caminho) ou de ("zip", arquivo, membro)"""
+    if source[0] == "zip":
+        archive = _open_archives.get(source[1])
+        if archive is None:
+            archive = _open_archives[source[1]] = zipfile.ZipFile(source[1])
+        return archive.read(source[2])
+    with open(source[1], "rb") as f:
+        return f.read()
+
+
+def _hash_image(path: str):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _process_batch(batch: list, images_dir: str) -> list:
+    """Valida, decodifica e grava as imagens de um lote (roda nos processos do pool).
+
+    Retorna (hash, caminho da imagem, resposta, erro) para cada card do lote.
+    Imagens que o deck já tem não são gravadas de novo (caminho None).
+    """
+    results = []
+    for source, answer in batch:
+        try:
+            data = _read_source(source)
+            with Image.open(io.BytesIO(data)) as image:
+                image_format = image.format
+                # Decodifica a imagem inteira: arquivos truncados falham aqui
+                image.load()
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile, Image.DecompressionBombError) as e:
+            results.append((None, None, answer, f"{source[-1]}: {e}"))
+            continue
+        digest = hashlib.sha256(data).hexdigest()
+        if digest in _known_hashes:
+            results.append((digest, None, answer, None))
+            continue
+        path = os.path.join(images_dir, f"{digest[:16]}.{image_format.lower()}")
+        if not os.path.exists(path):
+            # Arquivo temporário + rename: o deck nunca aponta para uma imagem pela metade
+            fd, tmp_path = tempfile.mkstemp(dir=images_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        results.append((digest, path, answer, None))
+    return results
+
+
+def answer_from_filename(name: str) -> str:
+    stem = os.path.splitext(os.path.basename(name))[0]
+    words = re.sub(r"^\d+[_\-\s]*", "", stem).replace("_", " ").replace("-", " ").strip()
+    return words[:1].upper() + words[1:]
+
+
+def _iter_csv(f, resolve, chunk_rows: int):
+    for chunk in pd.read_csv(f, usecols=[QUESTION, ANSWER], dtype=str, chunksize=chunk_rows):
+        for question, answer in zip(chunk[QUESTION], chunk[ANSWER]):
+            if isinstance(question, str) and isinstance(answer, str):
+                yield resolve(question), answer.strip()
+
+
+def iter_cards(input_path: str, chunk_rows: int = IMPORT_BATCH_SIZE):
+    """Gera (origem da imagem, resposta) de um CSV ou ZIP sem carregá-lo inteiro"""
+    if zipfile.is_zipfile(input_path):
+        archive_path = os.path.abspath(input_path)
+        with zipfile.ZipFile(archive_path) as archive:
+            names = archive.namelist()
+            csv_names = [name for name in names if name.lower().endswith(".csv")]
+            if csv_names:
+                with archive.open(csv_names[0]) as f:
+                    base = os.path.dirname(csv_names[0])
+                    yield from _iter_csv(
+                        f, lambda question: ("zip", archive_path, os.path.join(base, question).replace(os.sep, "/")), chunk_rows
+                    )
+            else:
+                for name in sorted(names):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield ("zip", archive_path, name), answer_from_filename(name)
+    else:
+        base = os.path.dirname(os.path.abspath(input_path))
+        with open(input_path, newline="", encoding="utf-8") as f:
+            yield from _iter_csv(f, lambda question: ("file", os.path.join(base, question)), chunk_rows)
+
+
+def _batches(iterable, size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ensure_deck_ids(deck_path: str = DATABASE_CSV) -> pd.DataFrame:
+    """Garante a coluna id no deck (IDs antigos: posição + 1) e retorna o deck"""
+    if not os.path.exists(deck_path):
+        deck_df = pd.DataFrame(columns=DECK_COLUMNS)
+    else:
+        deck_df = pd.read_csv(deck_path, dtype={QUESTION: str, ANSWER: str})
+        if ID in deck_df:
+            return deck_df
+        deck_df[ID] = deck_df.index + 1
+    tmp_path = f"{deck_path}.tmp"
+    deck_df.to_csv(tmp_path, index=False, lineterminator="\r\n")
+    os.replace(tmp_path, deck_path)
+    return deck_df
+
+
+def import_deck(
+    input_path: str,
+    deck_path: str = DATABASE_CSV,
+    images_dir: str = IMAGES_DIR,
+    workers: int = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict:
+    """Importa os cards de `input_path` para o deck e retorna as contagens"""
+    os.makedirs(images_dir, exist_ok=True)
+    deck_df = ensure_deck_ids(deck_path)
+    next_id = int(deck_df[ID].max()) + 1 if len(deck_df) else 1
+    counts = {"imported": 0, "duplicates": 0, "invalid": 0}
+    # Os caminhos das imagens no deck são relativos à pasta do deck
+    deck_dir = os.path.dirname(os.path.abspath(deck_path))
+    image_paths = [os.path.join(deck_dir, question) for question in deck_df[QUESTION] if isinstance(question, str)]
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Hashes das imagens já presentes no deck, para não importá-las de novo
+        known_hashes = set(pool.map(_hash_image, image_paths, chunksize=batch_size))
+        known_hashes.discard(None)
+
+    # O deck é copiado para um arquivo temporário, que recebe os cards novos e
+    # substitui o original só no final: uma falha no meio não deixa o deck pela metade
+    tmp_path = f"{deck_path}.tmp"
+    shutil.copyfile(deck_path, tmp_path)
+    try:
+        with open(tmp_path, "a+b") as deck_file:
+            # Decks editados à mão podem terminar sem quebra de linha
+            deck_file.seek(0, os.SEEK_END)
+            if deck_file.tell() > 0:
+                deck_file.seek(-1, os.SEEK_END)
+                if deck_file.read(1) != b"\n":
+                    deck_file.write(b"\r\n")
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(frozenset(known_hashes),))
+        with pool, open(tmp_path, "a", newline="", encoding="utf-8") as deck_file:
+            writer = csv.writer(deck_file, lineterminator="\r\n")
+            in_flight = deque()
+
+            def append_results(results: list):
+                nonlocal next_id
+                for digest, path, answer, error in results:
+                    if error is not None:
+                        counts["invalid"] += 1
+                        print(f"Imagem inválida ignorada: {error}", file=sys.stderr)
+                    elif digest in known_hashes:
+                        counts["duplicates"] += 1
+                    else:
+                        known_hashes.add(digest)
+                        deck_image_path = os.path.relpath(os.path.abspath(path), deck_dir).replace(os.sep, "/")
+                        writer.writerow([deck_image_path, answer, next_id])
+                        next_id += 1
+                        counts["imported"] += 1
+
+            # Os resultados são gravados na ordem da entrada, então os IDs são determinísticos
+            for batch in _batches(iter_cards(input_path, batch_size), batch_size):
+                in_flight.append(pool.submit(_process_batch, batch, images_dir))
+                if len(in_flight) >= workers * BATCHES_IN_FLIGHT_PER_WORKER:
+                    append_results(in_flight.popleft().result())
+            while in_flight:
+                append_results(in_flight.popleft().result())
+            deck_file.flush()
+            os.fsync(deck_file.fileno())
+        os.replace(tmp_path, deck_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV (question,answer) ou ZIP de imagens")
+    parser.add_argument("--deck", default=DATABASE_CSV, help="deck de destino (padrão: database.csv)")
+    parser.add_argument("--images-dir", default=IMAGES_DIR, help="pasta das imagens importadas")
+    parser.add_argument("--workers", type=int, help="processos do pool (padrão: um por núcleo)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="cards por tarefa do pool")
+    args = parser.parse_args()
+
+    try:
+        counts = import_deck(args.input, args.deck, args.images_dir, args.workers, args.batch_size)
+    except (OSError, zipfile.BadZipFile) as e:
+        sys.exit(f"Erro ao importar {args.input}: {e}")
+    print(
+        f"{counts['imported']} cards importados, {counts['duplicates']} duplicados e "
+        f"{counts['invalid']} imagens inválidas ignorados"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Snapshots binários do deck e do progresso já preparados, para um cold start rápido.
+
+Ler o CSV do deck e o progresso (snapshot CSV + journal, com conversão de datas)
+é o que domina a primeira renderização de um processo novo. O DataFrame pronto é
+gravado em FLASHCARDS_SNAPSHOT_DIR (padrão .snapshots) no formato Arrow IPC
+(feather), lido por memory map, ou em pickle quando o pacote opcional pyarrow
+não está instalado.
+
+Cada snapshot guarda a assinatura (mtime e tamanho) dos arquivos de origem e é
+refeito automaticamente quando ela muda. FLASHCARDS_SNAPSHOTS=0 desativa o cache.
+"""
+import json
+import os
+import pickle
+import re
+import sys
+import tempfile
+
+import pandas as pd
+
+import metrics
+
+SNAPSHOTS_ENABLED = os.environ.get("FLASHCARDS_SNAPSHOTS", "1") == "1"
+SNAPSHOT_DIR = os.environ.get("FLASHCARDS_SNAPSHOT_DIR", ".snapshots")
+
+# Chave dos metadados do arquivo Arrow com a assinatura das origens
+_SIGNATURE_KEY = b"flashcards.signature"
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+def _snapshot_path(key: str) -> str:
+    safe_key = re.sub(r"[^A-Za-z0-9_@.-]", "_", key)
+    return os.path.join(SNAPSHOT_DIR, f"{safe_key}.{'arrow' if pa is not None else 'pickle'}")
+
+
+def _stamp(key: str, signature: tuple) -> str:
+    # A chave também entra no carimbo: nomes de arquivo sanitizados podem coincidir
+    return json.dumps([key, signature])
+
+
+def _read(path: str, stamp: str):
+    """DataFrame do snapshot, ou None se ele não existe, está corrompido ou é de outra versão"""
+    try:
+        if pa is not None:
+            with pa.memory_map(path) as source:
+                reader = pa.ipc.open_file(source)
+                metadata = reader.schema.metadata or {}
+                if metadata.get(_SIGNATURE_KEY, b"").decode() != stamp:
+                    return None
+                return reader.read_all().to_pandas()
+        with open(path, "rb") as f:
+            saved_stamp, df = pickle.load(f)
+        return df if saved_stamp == stamp else None
+    except Exception:
+        # Arquivo ausente, truncado ou de outra versão do formato: o snapshot é refeito
+        return None
+
+
+def _write(path: str, stamp: str, df: pd.DataFrame):
+    # Arquivo temporário + rename: outro processo nunca lê um snapshot pela metade
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=SNAPSHOT_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if pa is not None:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                table = table.replace_schema_metadata({**(table.schema.metadata or {}), _SIGNATURE_KEY: stamp})
+                with pa.ipc.new_file(f, table.schema) as writer:
+                    writer.write_table(table)
+            else:
+                pickle.dump((stamp, df), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_snapshot(key: str, signature: tuple, build) -> pd.DataFrame:
+    """Retorna o DataFrame de `key` do snapshot, ou o monta com build() e grava o snapshot.
+
+    `signature` identifica a versão dos arquivos de origem; deve ser calculada
+    antes de build() ler esses arquivos.
+    """
+    if not SNAPSHOTS_ENABLED:
+        return build()
+    path = _snapshot_path(key)
+    stamp = _stamp(key, signature)
+    with metrics.span("read_snapshot"):
+        df = _read(path, stamp)
+    if df is not None:
+        metrics.increment("snapshot_hits")
+        return df
+    metrics.increment("snapshot_misses")
+    df = build()
+    try:
+        with metrics.span("write_snapshot"):
+            _write(path, stamp, df)
+    except Exception as e:
+        # Sem snapshot o próximo cold start só volta a ler os CSVs
+        print(f"Erro ao gravar o snapshot {path}: {e}", file=sys.stderr)
+    return df
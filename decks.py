@@ -0,0 +1,83 @@
+"""Decks disponíveis no app.
+
+Cada deck é um CSV próprio (question, answer e, opcionalmente, id e tags) e tem
+o progresso salvo separadamente, sob a chave devolvida por progress_key.
+"""
+import csv
+import os
+import re
+
+from constants import ANSWER, DATABASE_CSV, FLASHCARDS_CSV, ID, QUESTION, TAGS
+
+# Decks diferentes mantidos em memória ao mesmo tempo no processo
+DECK_CACHE_ENTRIES = int(os.environ.get("FLASHCARDS_DECK_CACHE", 4))
+
+# Separa usuário e deck na chave de progresso; não pode aparecer em nomes de usuário
+DECK_SEPARATOR = "@"
+
+# Um card pode ter várias tags separadas por vírgula ou espaço
+TAG_SEPARATOR = r"[,\s]+"
+
+
+class Deck:
+    def __init__(self, name: str, title: str, path: str, images: bool, default_tag: str = None):
+        self.name = name
+        self.title = title
+        self.path = path
+        # Decks de imagens têm o caminho da imagem em question; os demais, texto
+        self.images = images
+        # Tag dos cards quando o CSV não tem a coluna tags
+        self.default_tag = default_tag
+
+
+DEFAULT_DECK = "simbolos"
+
+DECKS = {
+    "simbolos": Deck("simbolos", "Símbolos de Segurança", DATABASE_CSV, images=True, default_tag="simbolos"),
+    "flashcards": Deck("flashcards", "Vocabulário e Linux", FLASHCARDS_CSV, images=False),
+}
+
+
+def get_deck(name: str) -> Deck:
+    """Deck pelo nome; nomes desconhecidos caem no deck padrão"""
+    return DECKS.get(name, DECKS[DEFAULT_DECK])
+
+
+def check_user(user: str) -> str:
+    """Rejeita (ValueError) nomes de usuário com o separador de deck.
+
+    Sem isso "ana@flashcards" no deck padrão teria a mesma chave de progresso (e
+    os mesmos arquivos e histórico) que "ana" no deck flashcards.
+    """
+    if DECK_SEPARATOR in user:
+        raise ValueError(f"Nome de usuário inválido: {user!r} ({DECK_SEPARATOR!r} é reservado)")
+    return user
+
+
+def progress_key(user: str, deck_name: str) -> str:
+    """Chave do progresso do usuário no deck; o deck padrão mantém a chave (e os arquivos) de antes"""
+    check_user(user)
+    return user if deck_name == DEFAULT_DECK else f"{user}{DECK_SEPARATOR}{deck_name}"
+
+
+def split_tags(tags: str) -> list:
+    return [tag for tag in re.split(TAG_SEPARATOR, tags or "") if tag]
+
+
+def read_cards(deck: Deck) -> list:
+    """Cards do deck como dicionários (id, question, answer, tags), lidos sem pandas"""
+    if not os.path.exists(deck.path):
+        return []
+    with open(deck.path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        # Decks antigos não têm a coluna id: o ID é a posição da linha
+        has_ids = ID in (reader.fieldnames or [])
+        return [
+            {
+                ID: int(row[ID]) if has_ids else position + 1,
+                QUESTION: row.get(QUESTION) or "",
+                ANSWER: row.get(ANSWER) or "",
+                TAGS: row.get(TAGS) or deck.default_tag,
+            }
+            for position, row in enumerate(reader)
+        ]
@@ -0,0 +1,110 @@
+"""Exportação do deck em blocos, sem montar o arquivo inteiro em memória.
+
+CSV está sempre disponível; Parquet e Arrow dependem do pacote opcional pyarrow.
+"""
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Linhas convertidas por bloco durante a exportação
+EXPORT_CHUNK_ROWS = int(os.environ.get("FLASHCARDS_EXPORT_CHUNK_ROWS", 50_000))
+
+# Quantos arquivos exportados ficam guardados para novos downloads
+EXPORT_CACHE_ENTRIES = 4
+
+# formato -> (tipo MIME, extensão)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.file", "arrow"),
+}
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+def available_formats() -> list:
+    if pa is None:
+        return ["csv"]
+    return list(EXPORT_FORMATS)
+
+
+def iter_chunks(df: pd.DataFrame, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start : start + chunk_rows]
+
+
+def write_csv(df: pd.DataFrame, f, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    # O cabeçalho vai só no primeiro bloco
+    for n_chunk, chunk in enumerate(iter_chunks(df, chunk_rows)):
+        f.write(chunk.to_csv(index=False, header=n_chunk == 0).encode("utf-8"))
+
+
+def write_parquet(df: pd.DataFrame, f, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    writer = None
+    for chunk in iter_chunks(df, chunk_rows):
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(f, table.schema)
+        writer.write_table(table)
+    if writer is not None:
+        writer.close()
+
+
+def write_arrow(df: pd.DataFrame, f, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    writer = None
+    for chunk in iter_chunks(df, chunk_rows):
+        batch = pa.RecordBatch.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            writer = pa.ipc.new_file(f, batch.schema)
+        writer.write_batch(batch)
+    if writer is not None:
+        writer.close()
+
+
+_WRITERS = {"csv": write_csv, "parquet": write_parquet, "arrow": write_arrow}
+
+
+def write_export(df: pd.DataFrame, export_format: str, path: str):
+    """Grava o deck no formato pedido, bloco a bloco"""
+    if export_format not in available_formats():
+        raise ValueError(f"Formato de exportação indisponível: {export_format}")
+    with open(path, "wb") as f:
+        _WRITERS[export_format](df, f)
+
+
+_export_cache = OrderedDict()
+_export_lock = threading.Lock()
+
+
+def get_export_file(df: pd.DataFrame, export_format: str, version) -> str:
+    """Caminho de um arquivo temporário com o deck exportado.
+
+    O arquivo é reaproveitado enquanto `version` não mudar, sem comparar o
+    conteúdo do DataFrame.
+    """
+    key = (version, export_format)
+    with _export_lock:
+        path = _export_cache.get(key)
+        if path is not None and os.path.exists(path):
+            _export_cache.move_to_end(key)
+            return path
+        fd, path = tempfile.mkstemp(prefix="flashcards-", suffix=f".{EXPORT_FORMATS[export_format][1]}")
+        os.close(fd)
+        write_export(df, export_format, path)
+        _export_cache[key] = path
+        # Apaga os arquivos das versões mais antigas
+        while len(_export_cache) > EXPORT_CACHE_ENTRIES:
+            _, old_path = _export_cache.popitem(last=False)
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
+        return path
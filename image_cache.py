@@ -0,0 +1,101 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+import metrics
+
+# Tamanho máximo em que as imagens dos símbolos são exibidas
+IMAGE_MAX_SIZE = (400, 400)
+IMAGE_FORMAT = "WEBP"
+
+# Limite de memória do cache de imagens já codificadas
+IMAGE_CACHE_MAX_BYTES = int(float(os.environ.get("FLASHCARDS_IMAGE_CACHE_MB", 32)) * 1024 * 1024)
+
+
+class ImageCache:
+    """Cache LRU de imagens codificadas, limitado pelo total de bytes armazenados"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._items
+
+    def get(self, key: str):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: bytes):
+        # Uma imagem maior que o cache inteiro não é armazenada
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = data
+            self._size += len(data)
+            # Remove as imagens usadas há mais tempo até caber no limite
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+
+_cache = ImageCache(IMAGE_CACHE_MAX_BYTES)
+_prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-prefetch")
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def encode_image(path: str) -> bytes:
+    """Reduz a imagem ao tamanho de exibição e recodifica em formato compacto"""
+    with Image.open(path) as image:
+        image.thumbnail(IMAGE_MAX_SIZE)
+        buffer = io.BytesIO()
+        image.save(buffer, format=IMAGE_FORMAT, lossless=True, method=6)
+    return buffer.getvalue()
+
+
+def load_image(path: str) -> bytes:
+    """Retorna a imagem pronta para exibição, codificando-a apenas na primeira vez"""
+    data = _cache.get(path)
+    if data is None:
+        metrics.increment("image_cache_misses")
+        data = encode_image(path)
+        _cache.put(path, data)
+    else:
+        metrics.increment("image_cache_hits")
+    return data
+
+
+def _prefetch(path: str):
+    try:
+        load_image(path)
+    except (OSError, ValueError):
+        # Erros aparecem quando o card for exibido de fato
+        pass
+    finally:
+        with _pending_lock:
+            _pending.discard(path)
+
+
+def prefetch_image(path: str):
+    """Prepara a imagem em segundo plano para que a próxima exibição seja imediata"""
+    if path in _cache:
+        return
+    with _pending_lock:
+        if path in _pending:
+            return
+        _pending.add(path)
+    _prefetch_executor.submit(_prefetch, path)
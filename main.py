@@ -1,30 +1,76 @@
-from datetime import datetime, timedelta
+import time
 
 import pandas as pd
 import streamlit as st
 
+import metrics
+from decks import DECKS
+from image_cache import load_image, prefetch_image
+from storage import file_signature
 from utils import (
     ANSWER,
-    DATE_ADDED,
     ID,
     NEXT_APPEARANCE,
     QUESTION,
+    ensure_session_flashcards,
+    flush_reviews,
+    get_card,
+    get_current_deck,
+    get_deck_version,
+    get_next_due_date,
     get_next_question,
-    load_all_flashcards,
-    save_flashcards,
-    initialize_question_queue,
+    get_session_flashcards,
+    get_tag_index,
+    history_dashboard,
     initialize_hard_questions_only,
+    initialize_question_queue,
+    restore_session,
+    review_card,
+    save_session,
+    view_flashcards,
 )
 
+_rerun_started = time.perf_counter()
+
 # -------------- app config ---------------
 st.set_page_config(page_title="Flashcards de Símbolos", page_icon="🚀", layout="centered")
-st.subheader("Estude os Símbolos!")
+st.subheader("Estude os Símbolos!" if get_current_deck().images else "Estude os Flashcards!")
 
 # ---------------- SESSION STATE ----------------
-if "flashcards_df" not in st.session_state:
-    st.session_state.flashcards_df = load_all_flashcards()
+# Sessão salva (?session= na URL): continua de onde parou, mesmo após um restart ou em outro processo
+if "session_token" not in st.session_state:
+    restore_session()
+
+# Seletor de deck; ?deck= na URL escolhe o deck inicial
+if "deck" not in st.session_state:
+    st.session_state.deck = get_current_deck().name
+st.sidebar.selectbox("Deck", list(DECKS), format_func=lambda name: DECKS[name].title, key="deck")
+deck = get_current_deck()
+
+# O conteúdo do deck é compartilhado entre sessões; aqui fica só o agendamento.
+# Somente o deck escolhido é carregado.
+with metrics.span("load_deck"):
+    ensure_session_flashcards()
+
+# Trocar de deck descarta o filtro de tags do deck anterior
+if st.session_state.get("session_deck") != deck.name and "tag_filter" in st.session_state:
+    del st.session_state["tag_filter"]
+
+# Filtro por tags, servido pelo índice tag -> cards do deck
+deck_tags = sorted(get_tag_index(deck))
+if len(deck_tags) > 1:
+    st.sidebar.multiselect("Tags", deck_tags, key="tag_filter", placeholder="Todas")
+
+# Outro deck ou outras tags: recomeçar a sessão de revisão
+session_scope = (deck.name, tuple(st.session_state.get("tag_filter", ())))
+if st.session_state.get("session_scope") != session_scope:
+    for key in ['question_queue', 'show_answer', 'current_question_id', 'session_stats', 'total_due_questions', 'hard_symbols_this_session', 'session_type', 'session_saved']:
+        if key in st.session_state:
+            del st.session_state[key]
+    st.session_state.session_scope = session_scope
+    st.session_state.session_deck = deck.name
 
-# Inicializar a fila de questões randomizadas
+# Inicializar a fila de prioridade com os cards vencidos
 if "question_queue" not in st.session_state:
     initialize_question_queue()
 
@@ -46,9 +92,9 @@ if "session_stats" not in st.session_state:
         "hard": 0
     }
 
-# Lista para rastrear IDs dos símbolos marcados como difíceis nesta sessão
+# Conjunto dos IDs dos símbolos marcados como difíceis nesta sessão
 if "hard_symbols_this_session" not in st.session_state:
-    st.session_state.hard_symbols_this_session = []
+    st.session_state.hard_symbols_this_session = set()
 
 # Tipo de sessão (completa ou apenas difíceis)
 if "session_type" not in st.session_state:
@@ -56,26 +102,30 @@ if "session_type" not in st.session_state:
 
 # Inicializar contagem total de questões disponíveis
 if "total_due_questions" not in st.session_state:
-    # Usar TODOS os flashcards em cada sessão (84 símbolos)
-    st.session_state.total_due_questions = len(st.session_state.flashcards_df)
+    # Apenas os cards vencidos entram na sessão
+    st.session_state.total_due_questions = len(st.session_state.question_queue)
     st.session_state.session_stats["total_questions"] = st.session_state.total_due_questions
 
+# Salvar a sessão recém-criada, para que possa ser retomada pelo token
+if "session_saved" not in st.session_state:
+    save_session()
+    st.session_state.session_saved = True
 
-# external css
-def local_css(file_name: str):
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _read_css(file_name: str, signature: tuple) -> str:
     with open(file_name) as f:
-        st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+        return f.read()
 
 
-local_css("style.css")
+# external css
+def local_css(file_name: str):
+    # O arquivo só é lido de novo quando muda
+    st.markdown(f"<style>{_read_css(file_name, file_signature(file_name))}</style>", unsafe_allow_html=True)
 
 
-def update_next_appearance(id: int, next_appearance: datetime):
-    if next_appearance is not None:
-        st.session_state.flashcards_df.loc[
-            st.session_state.flashcards_df[ID] == id, NEXT_APPEARANCE
-        ] = next_appearance
-        save_flashcards(st.session_state.flashcards_df)
+with metrics.span("local_css"):
+    local_css("style.css")
 
 
 def reset_answer_state():
@@ -83,15 +133,41 @@ def reset_answer_state():
     st.session_state.show_answer = False
 
 
+def toggle_answer():
+    st.session_state.show_answer = not st.session_state.show_answer
+
+
+def grade_card(card_id: int, difficulty: str):
+    """Callback dos botões de dificuldade: roda antes do rerun, que já exibe o próximo card"""
+    queue = st.session_state.question_queue
+    # Cliques repetidos no mesmo botão chegam depois que o card já saiu da fila
+    if queue.peek() != card_id:
+        return
+    # Intervalo calculado pelo agendador SM-2
+    with metrics.span("review_card"):
+        if st.session_state.session_type == "hard_only":
+            # Repetição no mesmo dia: o agendamento já foi atualizado na primeira resposta
+            next_appearance = get_card(card_id)[NEXT_APPEARANCE]
+        else:
+            next_appearance = review_card(card_id, difficulty)
+    update_session_stats(difficulty, card_id)
+
+    # Remover a questão atual da fila e resetar o estado da resposta
+    queue.pop()
+    reset_answer_state()
+    st.session_state.last_next_appearance = next_appearance
+    save_session()
+
+
 def update_session_stats(difficulty: str, symbol_id: int):
     """Atualiza as estatísticas da sessão"""
     try:
         st.session_state.session_stats["answered"] += 1
         st.session_state.session_stats[difficulty] += 1
         
-        # Se marcado como difícil, adicionar à lista de símbolos difíceis desta sessão
-        if difficulty == "hard" and symbol_id not in st.session_state.hard_symbols_this_session:
-            st.session_state.hard_symbols_this_session.append(symbol_id)
+        # Se marcado como difícil, adicionar ao conjunto de símbolos difíceis desta sessão
+        if difficulty == "hard":
+            st.session_state.hard_symbols_this_session.add(symbol_id)
     except Exception as e:
         st.error(f"Erro ao atualizar estatísticas: {str(e)}")
         # Reinicializar estatísticas se houver erro
@@ -121,17 +197,18 @@ def reset_session():
     }
     
     # Reinicializar outros estados
-    st.session_state.hard_symbols_this_session = []
+    st.session_state.hard_symbols_this_session = set()
     st.session_state.session_type = "complete"
     st.session_state.show_answer = False
     st.session_state.current_question_id = None
     
-    # Reinicializar contagem total com TODOS os flashcards
-    st.session_state.total_due_questions = len(st.session_state.flashcards_df)
-    st.session_state.session_stats["total_questions"] = st.session_state.total_due_questions
-    
-    # Inicializar nova fila de questões randomizada
+    # Inicializar nova fila com os cards vencidos
     initialize_question_queue()
+    
+    # Reinicializar contagem total com os cards vencidos
+    st.session_state.total_due_questions = len(st.session_state.question_queue)
+    st.session_state.session_stats["total_questions"] = st.session_state.total_due_questions
+    save_session()
 
 
 def start_hard_only_session():
@@ -163,209 +240,240 @@ def start_hard_only_session():
     
     # Inicializar fila apenas com símbolos difíceis
     initialize_hard_questions_only()
+    save_session()
 
 
 # ---------------- Main page ----------------
 
-st.markdown("## 🔥 Revisão de Símbolos de Segurança")
+st.markdown(f"## 🔥 Revisão: {deck.title}")
 
 # Mostrar tipo de sessão
 if st.session_state.session_type == "hard_only":
     st.markdown("### 🎯 **Sessão: Apenas Símbolos Difíceis**")
     st.info(f"Revisando {len(st.session_state.hard_symbols_this_session)} símbolos marcados como difíceis na sessão anterior.")
 else:
-    st.markdown("### 📚 **Sessão: Todos os Símbolos**")
+    st.markdown("### 📚 **Sessão: Símbolos para Revisar**")
 
 st.markdown("---")
 
-# Mostrar barra de progresso e estatísticas
-if st.session_state.total_due_questions > 0:
-    # Calcular progresso com validação
-    answered = st.session_state.session_stats["answered"]
-    total = st.session_state.session_stats["total_questions"]
-    
-    if total > 0:
-        progress = answered / total
-        # Garantir que o progresso esteja entre 0 e 1
-        progress = max(0.0, min(1.0, progress))
-    else:
-        progress = 0.0
-    
-    # Barra de progresso
-    st.progress(progress, text=f"Progresso: {answered}/{total} símbolos")
-    
-    # Estatísticas em tempo real
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.metric("📊 Respondidos", st.session_state.session_stats["answered"])
-    with col2:
-        st.metric("😊 Fácil", st.session_state.session_stats["easy"], delta=None, delta_color="normal")
-    with col3:
-        st.metric("😐 Médio", st.session_state.session_stats["medium"], delta=None, delta_color="normal")
-    with col4:
-        st.metric("😰 Difícil", st.session_state.session_stats["hard"], delta=None, delta_color="normal")
-    
-    st.markdown("---")
 
-try:
-    current_row = get_next_question()
-    
-    if current_row is not None:
-        # Se mudou a questão, resetar o estado da resposta
-        if st.session_state.current_question_id != current_row[ID]:
-            st.session_state.current_question_id = current_row[ID]
-            reset_answer_state()
+def render_review_panel():
+    """Progresso da sessão, card atual e relatório final"""
+    # Mostrar barra de progresso e estatísticas
+    if st.session_state.total_due_questions > 0:
+        # Calcular progresso com validação
+        answered = st.session_state.session_stats["answered"]
+        total = st.session_state.session_stats["total_questions"]
         
-        st.image(current_row[QUESTION])
-        st.markdown(f"<h4>&mdash; Símbolo nº {current_row[ID]}</h4>", unsafe_allow_html=True)
-
-        # Botão para mostrar/esconder resposta
-        if st.button("Mostrar/Esconder Resposta", key="toggle_answer"):
-            st.session_state.show_answer = not st.session_state.show_answer
-
-        # Mostrar resposta se o estado estiver ativo
-        if st.session_state.show_answer:
-            st.markdown(f'<div class="answer"><p>{current_row[ANSWER]}</p></div>', unsafe_allow_html=True)
-
-        next_appearance = None
-        difficulty_selected = None
+        if total > 0:
+            progress = answered / total
+            # Garantir que o progresso esteja entre 0 e 1
+            progress = max(0.0, min(1.0, progress))
+        else:
+            progress = 0.0
+        
+        # Barra de progresso
+        st.progress(progress, text=f"Progresso: {answered}/{total} símbolos")
         
-        col1, col2, col3 = st.columns(3, gap="large")
+        # Estatísticas em tempo real
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
-            easy_submit_button: bool = st.button(label="😊 Fácil", use_container_width=True)
-            if easy_submit_button:
-                prev_time_diff = current_row[NEXT_APPEARANCE] - current_row[DATE_ADDED]
-                next_appearance_days = min(prev_time_diff.days + 2, 60)
-                next_appearance = datetime.now() + timedelta(days=next_appearance_days)
-                difficulty_selected = "easy"
+            st.metric("📊 Respondidos", st.session_state.session_stats["answered"])
         with col2:
-            medium_submit_button: bool = st.button(
-                label="😐 Médio", use_container_width=True
-            )
-            if medium_submit_button:
-                next_appearance = datetime.now() + timedelta(days=2)
-                difficulty_selected = "medium"
+            st.metric("😊 Fácil", st.session_state.session_stats["easy"], delta=None, delta_color="normal")
         with col3:
-            hard_submit_button: bool = st.button(label="😰 Difícil", use_container_width=True)
-            if hard_submit_button:
-                next_appearance = datetime.now() + timedelta(days=1)
-                difficulty_selected = "hard"
-
-        if next_appearance is not None and difficulty_selected is not None:
-            update_next_appearance(current_row[ID], next_appearance)
-            update_session_stats(difficulty_selected, current_row[ID])
-            
-            # Remover a questão atual da fila e resetar o estado da resposta
-            if len(st.session_state.question_queue) > 0:
-                st.session_state.question_queue.pop(0)
-            reset_answer_state()
-            
-            st.info(
-                f"""A próxima aparição deste card será em {next_appearance.date().strftime("%d-%m-%Y")}!""",
-                icon="🎉",
-            )
-            st.rerun()
-    else:
-        # Sessão completa - mostrar estatísticas finais
-        try:
-            st.balloons()
-            st.success("🎉 Parabéns! Você completou todos os flashcards!", icon="🏆")
-            
-            # Estatísticas detalhadas finais
-            st.markdown("## 📊 Relatório da Sessão")
-            
-            # Validar valores das estatísticas
-            total_answered = max(1, st.session_state.session_stats.get("answered", 1))  # Evitar divisão por zero
-            easy_count = st.session_state.session_stats.get("easy", 0)
-            medium_count = st.session_state.session_stats.get("medium", 0)
-            hard_count = st.session_state.session_stats.get("hard", 0)
-            
-            # Garantir que os valores sejam consistentes
-            if easy_count + medium_count + hard_count != total_answered:
-                # Se houver inconsistência, ajustar
-                total_answered = easy_count + medium_count + hard_count
-                if total_answered == 0:
-                    total_answered = 1
+            st.metric("😐 Médio", st.session_state.session_stats["medium"], delta=None, delta_color="normal")
+        with col4:
+            st.metric("😰 Difícil", st.session_state.session_stats["hard"], delta=None, delta_color="normal")
+        
+        st.markdown("---")
+
+    # Data da próxima aparição do card respondido por último
+    next_appearance = st.session_state.pop("last_next_appearance", None)
+    if next_appearance is not None:
+        st.info(
+            f"""A próxima aparição deste card será em {next_appearance.date().strftime("%d-%m-%Y")}!""",
+            icon="🎉",
+        )
+
+    try:
+        with metrics.span("get_next_question"):
+            current_row = get_next_question()
+        
+        if current_row is not None:
+            # Se mudou a questão, resetar o estado da resposta
+            if st.session_state.current_question_id != current_row[ID]:
+                st.session_state.current_question_id = current_row[ID]
+                reset_answer_state()
             
-            # Métricas principais
-            col1, col2, col3, col4 = st.columns(4)
+            deck = get_current_deck()
+            if deck.images:
+                with metrics.span("render_image"):
+                    st.image(load_image(current_row[QUESTION]))
+                st.markdown(f"<h4>&mdash; Símbolo nº {current_row[ID]}</h4>", unsafe_allow_html=True)
+
+                # Pré-carregar em segundo plano a imagem do próximo card da fila
+                upcoming_ids = st.session_state.question_queue.upcoming(2)
+                if len(upcoming_ids) > 1:
+                    upcoming_row = get_card(upcoming_ids[1])
+                    if upcoming_row is not None:
+                        prefetch_image(upcoming_row[QUESTION])
+            else:
+                st.markdown(f"### {current_row[QUESTION]}")
+                st.markdown(f"<h4>&mdash; Card nº {current_row[ID]}</h4>", unsafe_allow_html=True)
+
+            # Botão para mostrar/esconder resposta
+            st.button("Mostrar/Esconder Resposta", key="toggle_answer", on_click=toggle_answer)
+
+            # Mostrar resposta se o estado estiver ativo
+            if st.session_state.show_answer:
+                st.markdown(f'<div class="answer"><p>{current_row[ANSWER]}</p></div>', unsafe_allow_html=True)
+
+            col1, col2, col3 = st.columns(3, gap="large")
             with col1:
-                st.metric("Total Respondidos", total_answered)
+                st.button(
+                    label="😊 Fácil", use_container_width=True, on_click=grade_card, args=(current_row[ID], "easy")
+                )
             with col2:
-                easy_pct = (easy_count / total_answered * 100) if total_answered > 0 else 0
-                easy_pct = max(0, min(100, easy_pct))  # Garantir que esteja entre 0 e 100
-                st.metric("😊 Fácil", f"{easy_count} ({easy_pct:.1f}%)")
+                st.button(
+                    label="😐 Médio", use_container_width=True, on_click=grade_card, args=(current_row[ID], "medium")
+                )
             with col3:
-                medium_pct = (medium_count / total_answered * 100) if total_answered > 0 else 0
-                medium_pct = max(0, min(100, medium_pct))  # Garantir que esteja entre 0 e 100
-                st.metric("😐 Médio", f"{medium_count} ({medium_pct:.1f}%)")
-            with col4:
-                hard_pct = (hard_count / total_answered * 100) if total_answered > 0 else 0
-                hard_pct = max(0, min(100, hard_pct))  # Garantir que esteja entre 0 e 100
-                st.metric("😰 Difícil", f"{hard_count} ({hard_pct:.1f}%)")
-            
-            # Gráfico de barras das estatísticas
-            chart_data = pd.DataFrame({
-                'Dificuldade': ['Fácil', 'Médio', 'Difícil'],
-                'Quantidade': [easy_count, medium_count, hard_count],
-                'Percentual': [easy_pct, medium_pct, hard_pct]
-            })
-            
-            st.markdown("### 📈 Distribuição das Respostas")
-            if chart_data['Quantidade'].sum() > 0:  # Só mostrar gráfico se houver dados
-                st.bar_chart(chart_data.set_index('Dificuldade')['Quantidade'])
-            
-            # Análise do desempenho
-            st.markdown("### 🎯 Análise do Desempenho")
-            
-            if easy_pct >= 70:
-                st.success("🌟 Excelente! Você domina bem os símbolos de segurança!")
-            elif easy_pct >= 50:
-                st.info("👍 Bom trabalho! Continue praticando para melhorar ainda mais.")
-            elif hard_pct >= 50:
-                st.warning("📚 Foque mais no estudo - muitos símbolos precisam de mais atenção.")
-            else:
-                st.info("💪 Continue praticando! A repetição é a chave do aprendizado.")
-            
-            # Informação sobre símbolos difíceis
-            if len(st.session_state.hard_symbols_this_session) > 0:
-                st.markdown("### 🎯 Símbolos que Precisam de Mais Atenção")
-                st.warning(f"Você marcou **{len(st.session_state.hard_symbols_this_session)} símbolos** como difíceis nesta sessão.")
-                st.info("💡 **Dica:** Pratique apenas esses símbolos para melhorar mais rapidamente!")
-            
-            # Botões para próximas ações
-            st.markdown("---")
-            st.markdown("### 🚀 Próximos Passos")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Botão para estudar apenas os difíceis (só aparece se houver símbolos difíceis)
+                st.button(
+                    label="😰 Difícil", use_container_width=True, on_click=grade_card, args=(current_row[ID], "hard")
+                )
+        elif st.session_state.session_stats["answered"] == 0:
+            # Nenhum card vencido: não há o que revisar agora
+            st.success("🎉 Nenhum símbolo para revisar agora!", icon="✅")
+            next_due = get_next_due_date()
+            if next_due is not None:
+                st.info(f"A próxima revisão será em {next_due.strftime('%d-%m-%Y')}.")
+        else:
+            # Sessão completa - gravar as revisões pendentes e mostrar estatísticas finais
+            flush_reviews(st.session_state.progress_key)
+            try:
+                st.balloons()
+                st.success("🎉 Parabéns! Você completou todos os flashcards!", icon="🏆")
+                
+                # Estatísticas detalhadas finais
+                st.markdown("## 📊 Relatório da Sessão")
+                
+                # Validar valores das estatísticas
+                total_answered = max(1, st.session_state.session_stats.get("answered", 1))  # Evitar divisão por zero
+                easy_count = st.session_state.session_stats.get("easy", 0)
+                medium_count = st.session_state.session_stats.get("medium", 0)
+                hard_count = st.session_state.session_stats.get("hard", 0)
+                
+                # Garantir que os valores sejam consistentes
+                if easy_count + medium_count + hard_count != total_answered:
+                    # Se houver inconsistência, ajustar
+                    total_answered = easy_count + medium_count + hard_count
+                    if total_answered == 0:
+                        total_answered = 1
+                
+                # Métricas principais
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Total Respondidos", total_answered)
+                with col2:
+                    easy_pct = (easy_count / total_answered * 100) if total_answered > 0 else 0
+                    easy_pct = max(0, min(100, easy_pct))  # Garantir que esteja entre 0 e 100
+                    st.metric("😊 Fácil", f"{easy_count} ({easy_pct:.1f}%)")
+                with col3:
+                    medium_pct = (medium_count / total_answered * 100) if total_answered > 0 else 0
+                    medium_pct = max(0, min(100, medium_pct))  # Garantir que esteja entre 0 e 100
+                    st.metric("😐 Médio", f"{medium_count} ({medium_pct:.1f}%)")
+                with col4:
+                    hard_pct = (hard_count / total_answered * 100) if total_answered > 0 else 0
+                    hard_pct = max(0, min(100, hard_pct))  # Garantir que esteja entre 0 e 100
+                    st.metric("😰 Difícil", f"{hard_count} ({hard_pct:.1f}%)")
+                
+                # Gráfico de barras das estatísticas
+                chart_data = pd.DataFrame({
+                    'Dificuldade': ['Fácil', 'Médio', 'Difícil'],
+                    'Quantidade': [easy_count, medium_count, hard_count],
+                    'Percentual': [easy_pct, medium_pct, hard_pct]
+                })
+                
+                st.markdown("### 📈 Distribuição das Respostas")
+                if chart_data['Quantidade'].sum() > 0:  # Só mostrar gráfico se houver dados
+                    st.bar_chart(chart_data.set_index('Dificuldade')['Quantidade'])
+                
+                # Análise do desempenho
+                st.markdown("### 🎯 Análise do Desempenho")
+                
+                if easy_pct >= 70:
+                    st.success("🌟 Excelente! Você domina bem os símbolos de segurança!")
+                elif easy_pct >= 50:
+                    st.info("👍 Bom trabalho! Continue praticando para melhorar ainda mais.")
+                elif hard_pct >= 50:
+                    st.warning("📚 Foque mais no estudo - muitos símbolos precisam de mais atenção.")
+                else:
+                    st.info("💪 Continue praticando! A repetição é a chave do aprendizado.")
+                
+                # Informação sobre símbolos difíceis
                 if len(st.session_state.hard_symbols_this_session) > 0:
-                    if st.button("🎯 Estudar Apenas os Difíceis", use_container_width=True, key="hard_only_btn", type="secondary"):
-                        start_hard_only_session()
+                    st.markdown("### 🎯 Símbolos que Precisam de Mais Atenção")
+                    st.warning(f"Você marcou **{len(st.session_state.hard_symbols_this_session)} símbolos** como difíceis nesta sessão.")
+                    st.info("💡 **Dica:** Pratique apenas esses símbolos para melhorar mais rapidamente!")
+                
+                # Estatísticas acumuladas de todas as sessões
+                history_dashboard(st.session_state.progress_key)
+
+                # Botões para próximas ações
+                st.markdown("---")
+                st.markdown("### 🚀 Próximos Passos")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    # Botão para estudar apenas os difíceis (só aparece se houver símbolos difíceis)
+                    if len(st.session_state.hard_symbols_this_session) > 0:
+                        if st.button("🎯 Estudar Apenas os Difíceis", use_container_width=True, key="hard_only_btn", type="secondary"):
+                            start_hard_only_session()
+                            st.rerun()
+                    else:
+                        st.info("🎉 Nenhum símbolo foi marcado como difícil!")
+                
+                with col2:
+                    # Botão para nova sessão completa
+                    if st.button("🔄 Iniciar Nova Sessão Completa", use_container_width=True, key="new_session_btn", type="primary"):
+                        reset_session()
                         st.rerun()
-                else:
-                    st.info("🎉 Nenhum símbolo foi marcado como difícil!")
-            
-            with col2:
-                # Botão para nova sessão completa
-                if st.button("🔄 Iniciar Nova Sessão Completa", use_container_width=True, key="new_session_btn", type="primary"):
-                    reset_session()
-                    st.rerun()
-                    
-        except Exception as e:
-            st.error("Erro ao gerar relatório final. Reiniciando sessão...")
+                        
+            except Exception as e:
+                st.error("Erro ao gerar relatório final. Reiniciando sessão...")
+                reset_session()
+                st.rerun()
+                
+    except FileNotFoundError:
+        st.error("Erro: Verifique se as imagens estão na pasta 'images' e se o arquivo 'database.csv' está no diretório correto.")
+    except Exception as e:
+        st.error(f"Erro ao carregar flashcard: {str(e)}")
+        st.info("Tentando reiniciar a sessão...")
+        try:
             reset_session()
             st.rerun()
-            
-except FileNotFoundError:
-    st.error("Erro: Verifique se as imagens estão na pasta 'images' e se o arquivo 'database.csv' está no diretório correto.")
-except Exception as e:
-    st.error(f"Erro ao carregar flashcard: {str(e)}")
-    st.info("Tentando reiniciar a sessão...")
-    try:
-        reset_session()
-        st.rerun()
-    except:
-        st.error("Erro crítico. Recarregue a página.")
+        except:
+            st.error("Erro crítico. Recarregue a página.")
+
+
+@st.fragment
+def review_panel():
+    """Painel do card: mostrar a resposta ou responder reexecuta só esta parte da página"""
+    with metrics.span("review_panel"):
+        render_review_panel()
+    metrics.flush()
+
+
+review_panel()
+
+# A tabela completa só é montada sob demanda: é uma cópia do deck com o agendamento da sessão
+if st.sidebar.toggle("Mostrar todos os flashcards", key="show_all_flashcards"):
+    st.markdown("---")
+    st.markdown("### 📋 Todos os Flashcards")
+    view_flashcards(get_session_flashcards(), get_deck_version())
+
+# Reruns interrompidos por st.rerun() não chegam até aqui; suas fases já foram medidas
+metrics.observe("rerun", time.perf_counter() - _rerun_started)
+metrics.flush()
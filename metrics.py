@@ -0,0 +1,153 @@
+"""Métricas opcionais de desempenho no formato de texto do Prometheus.
+
+Desativadas por padrão; com FLASHCARDS_METRICS=1 são registrados:
+
+- flashcards_phase_seconds: histograma da duração de cada fase de um rerun
+  (carga do deck, CSS, busca do card, imagem, gravação da revisão...);
+- flashcards_events_total: contadores (revisões, gravações, acertos e faltas de cache).
+
+As métricas são gravadas periodicamente em FLASHCARDS_METRICS_FILE (para o
+textfile collector do node_exporter) e, se FLASHCARDS_METRICS_PORT estiver
+definido, servidas em http://0.0.0.0:<porta>/metrics.
+"""
+import contextlib
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_ENABLED = os.environ.get("FLASHCARDS_METRICS") == "1"
+METRICS_FILE = os.environ.get("FLASHCARDS_METRICS_FILE", "flashcards_metrics.prom")
+METRICS_PORT = os.environ.get("FLASHCARDS_METRICS_PORT")
+
+# Intervalo mínimo entre gravações do arquivo de métricas
+FLUSH_INTERVAL_S = 15
+
+# Limites superiores (segundos) dos buckets do histograma
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_NULL_SPAN = contextlib.nullcontext()
+
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_last_flush = 0.0
+_server = None
+
+
+class _Histogram:
+    def __init__(self):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+
+
+class _Span:
+    __slots__ = ("phase", "start")
+
+    def __init__(self, phase: str):
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe(self.phase, time.perf_counter() - self.start)
+        return False
+
+
+def span(phase: str):
+    """Context manager que mede a duração de uma fase; sem custo quando desativado"""
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    return _Span(phase)
+
+
+def observe(phase: str, seconds: float):
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        histogram = _histograms.get(phase)
+        if histogram is None:
+            histogram = _histograms[phase] = _Histogram()
+        histogram.observe(seconds)
+
+
+def increment(event: str, amount: int = 1):
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        _counters[event] = _counters.get(event, 0) + amount
+
+
+def render() -> str:
+    """Métricas atuais no formato de exposição de texto do Prometheus"""
+    lines = [
+        "# HELP flashcards_phase_seconds Duração das fases de um rerun do app.",
+        "# TYPE flashcards_phase_seconds histogram",
+    ]
+    with _lock:
+        for phase, histogram in sorted(_histograms.items()):
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), histogram.bucket_counts):
+                cumulative += count
+                lines.append(f'flashcards_phase_seconds_bucket{{phase="{phase}",le="{bound}"}} {cumulative}')
+            lines.append(f'flashcards_phase_seconds_sum{{phase="{phase}"}} {histogram.total}')
+            lines.append(f'flashcards_phase_seconds_count{{phase="{phase}"}} {histogram.count}')
+        lines.append("# HELP flashcards_events_total Contadores de eventos do app.")
+        lines.append("# TYPE flashcards_events_total counter")
+        for event, value in sorted(_counters.items()):
+            lines.append(f'flashcards_events_total{{event="{event}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def write_file(path: str = METRICS_FILE):
+    # Arquivo temporário + rename, para o coletor nunca ler um arquivo pela metade
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_server():
+    global _server
+    _server = ThreadingHTTPServer(("0.0.0.0", int(METRICS_PORT)), _MetricsHandler)
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+
+
+def flush():
+    """Grava o arquivo de métricas se o intervalo já passou e inicia o endpoint HTTP, se configurado"""
+    global _last_flush
+    if not METRICS_ENABLED:
+        return
+    now = time.monotonic()
+    with _lock:
+        if METRICS_PORT and _server is None:
+            _start_server()
+        if now - _last_flush < FLUSH_INTERVAL_S:
+            return
+        _last_flush = now
+    write_file()
@@ -0,0 +1,196 @@
+"""Agendamento das revisões (SM-2) e fila de cards ordenada pelo vencimento."""
+import heapq
+import os
+import random
+from array import array
+from datetime import datetime, timedelta
+
+from constants import DATE_ADDED, EASE, INTERVAL, NEXT_APPEARANCE, REPETITIONS
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+MAX_INTERVAL_DAYS = 365
+
+# Máximo de cards revisados por usuário em um dia
+DAILY_REVIEW_LIMIT = int(os.environ.get("FLASHCARDS_DAILY_LIMIT", 200))
+
+# Nota SM-2 (0 a 5) de cada botão de dificuldade
+QUALITY = {"easy": 5, "medium": 4, "hard": 2}
+
+_EPOCH = datetime(1970, 1, 1)
+
+# NaT convertido para int64 pelo numpy/pandas
+NAT_MICROS = -(2**63)
+# Data sentinela das datas ausentes nos arrays de agendamento: 1970-01-01, um card vencido agora
+MISSING_DATE_MICROS = 0
+
+
+def to_micros(moment: datetime) -> int:
+    """Data (sem fuso) em microssegundos desde 1970-01-01"""
+    return (moment - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros: int) -> datetime:
+    # NaT não tem data: vale a sentinela, em vez de estourar o timedelta
+    if micros == NAT_MICROS:
+        micros = MISSING_DATE_MICROS
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def next_review(ease: float, interval: int, repetitions: int, difficulty: str, now: datetime) -> tuple:
+    """Calcula o novo estado do card pelo algoritmo SM-2.
+
+    Retorna (ease, interval, repetitions, next_appearance), com o intervalo em dias.
+    """
+    quality = QUALITY[difficulty]
+    if quality < 3:
+        # Errou: recomeça a sequência e revê amanhã
+        repetitions = 0
+        interval = 1
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval = 1
+        elif repetitions == 2:
+            interval = 6
+        else:
+            interval = round(interval * ease)
+    interval = min(max(interval, 1), MAX_INTERVAL_DAYS)
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return ease, interval, repetitions, now + timedelta(days=interval)
+
+
+def new_card_progress(now: datetime) -> dict:
+    """Estado de um card sem progresso salvo: vencido desde ontem"""
+    return {
+        DATE_ADDED: now,
+        NEXT_APPEARANCE: now - timedelta(days=1),
+        EASE: DEFAULT_EASE,
+        INTERVAL: 0,
+        REPETITIONS: 0,
+    }
+
+
+def apply_review(progress: dict, difficulty: str, now: datetime) -> dict:
+    """Novo progresso do card depois de uma resposta"""
+    ease, interval, repetitions, next_appearance = next_review(
+        progress[EASE], progress[INTERVAL], progress[REPETITIONS], difficulty, now
+    )
+    return {
+        DATE_ADDED: progress[DATE_ADDED],
+        NEXT_APPEARANCE: next_appearance,
+        EASE: ease,
+        INTERVAL: interval,
+        REPETITIONS: repetitions,
+    }
+
+
+def last_reviewed(progress: dict):
+    """Data da última revisão (próxima aparição menos o intervalo); None para cards nunca revisados"""
+    interval = int(progress[INTERVAL])
+    return progress[NEXT_APPEARANCE] - timedelta(days=interval) if interval > 0 else None
+
+
+def next_serving_date(next_due: datetime, reviewed_today: int, now: datetime) -> datetime:
+    """Quando a fila volta a ter cards: no vencimento mais próximo, mas só amanhã se o limite diário já foi usado"""
+    if reviewed_today >= DAILY_REVIEW_LIMIT:
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        return max(next_due, tomorrow)
+    return next_due
+
+
+class ReviewQueue:
+    """Fila de prioridade (heap binário) de IDs de cards, do vencimento mais antigo ao mais novo.
+
+    Empates de vencimento são desfeitos aleatoriamente, então cards novos
+    (todos com o mesmo vencimento) aparecem embaralhados sem ordenar o deck.
+    """
+
+    def __init__(self, entries=()):
+        # entries: pares (card_id, vencimento)
+        self._heap = [(due, random.random(), card_id) for card_id, due in entries]
+        heapq.heapify(self._heap)
+
+    @classmethod
+    def from_ids(cls, card_ids) -> "ReviewQueue":
+        """Cria uma fila que respeita a ordem dos IDs informados"""
+        return cls((card_id, position) for position, card_id in enumerate(card_ids))
+
+    @classmethod
+    def due(cls, card_ids, due_times, now, limit: int = DAILY_REVIEW_LIMIT) -> "ReviewQueue":
+        """Cria a fila apenas com os cards vencidos até `now`, no máximo `limit` cards"""
+        queue = cls()
+        entries = [(due, random.random(), card_id) for card_id, due in zip(card_ids, due_times) if due <= now]
+        if len(entries) > limit:
+            entries = heapq.nsmallest(limit, entries)
+        heapq.heapify(entries)
+        queue._heap = entries
+        return queue
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, card_id: int, due):
+        heapq.heappush(self._heap, (due, random.random(), card_id))
+
+    def peek(self):
+        """ID do próximo card, sem removê-lo da fila"""
+        return self._heap[0][2] if self._heap else None
+
+    def pop(self):
+        """Remove e retorna o ID do próximo card"""
+        return heapq.heappop(self._heap)[2] if self._heap else None
+
+    def snapshot(self) -> list:
+        """Entradas do heap (vencimento, desempate, ID), na ordem do heap, para salvar a fila"""
+        return [list(entry) for entry in self._heap]
+
+    @classmethod
+    def restore(cls, entries) -> "ReviewQueue":
+        """Recria a fila salva por snapshot(), com a mesma ordem e os mesmos desempates"""
+        queue = cls()
+        queue._heap = [tuple(entry) for entry in entries]
+        heapq.heapify(queue._heap)
+        return queue
+
+    def upcoming(self, n: int) -> list:
+        """IDs dos próximos n cards, em ordem"""
+        # Os n menores itens de um heap estão sempre entre as 2**n - 1 primeiras posições
+        return [card_id for _, _, card_id in heapq.nsmallest(n, self._heap[: 2**n - 1])]
+
+
+class CardSchedule:
+    """Estado de agendamento de um usuário em arrays tipados compactos.
+
+    A posição i de cada array corresponde à linha i do deck compartilhado, então
+    o conteúdo dos cards (imagem, resposta, tags) não é copiado por sessão. Datas
+    são microssegundos desde 1970-01-01 (int64); ocupa 26 bytes por card.
+    """
+
+    __slots__ = ("date_added", "next_appearance", "ease", "interval", "repetitions")
+
+    def __init__(self, date_added: array, next_appearance: array, ease: array, interval: array, repetitions: array):
+        self.date_added = date_added  # int64
+        self.next_appearance = next_appearance  # int64
+        self.ease = ease  # float32
+        self.interval = interval  # int32, em dias
+        self.repetitions = repetitions  # uint16
+
+    def __len__(self) -> int:
+        return len(self.next_appearance)
+
+    def get(self, position: int) -> dict:
+        return {
+            DATE_ADDED: from_micros(self.date_added[position]),
+            NEXT_APPEARANCE: from_micros(self.next_appearance[position]),
+            EASE: round(self.ease[position], 4),  # float32 -> valor decimal original
+            INTERVAL: self.interval[position],
+            REPETITIONS: self.repetitions[position],
+        }
+
+    def set(self, position: int, progress: dict):
+        self.date_added[position] = to_micros(progress[DATE_ADDED])
+        self.next_appearance[position] = to_micros(progress[NEXT_APPEARANCE])
+        self.ease[position] = progress[EASE]
+        self.interval[position] = progress[INTERVAL]
+        self.repetitions[position] = progress[REPETITIONS]
@@ -0,0 +1,122 @@
+"""Índice de busca dos cards: sem acentos, sem diferença de maiúsculas e tolerante a erros."""
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+
+# Similaridade mínima (Jaccard de trigramas) para aceitar uma palavra com erro de digitação
+MIN_SIMILARITY = 0.4
+
+# Peso de cada tipo de correspondência na pontuação do card
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Remove acentos e ignora maiúsculas/minúsculas ("Água" -> "agua")"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokenize(text: str) -> list:
+    return _TOKEN_PATTERN.findall(normalize(text))
+
+
+def trigrams(token: str) -> set:
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Índice invertido (palavra -> cards) com índice de trigramas sobre o vocabulário.
+
+    A busca casa cada palavra da consulta por igualdade, por prefixo ou, se
+    nenhuma das duas existir, por semelhança de trigramas. Um card precisa casar
+    todas as palavras da consulta e é ordenado pela soma das pontuações.
+    """
+
+    def __init__(self, texts):
+        # texts: um texto por card, na ordem das linhas do deck
+        postings = defaultdict(list)
+        size = 0
+        for position, text in enumerate(texts):
+            for token in dict.fromkeys(tokenize(text)):
+                postings[token].append(position)
+            size = position + 1
+        self.size = size
+        self.postings = {token: np.array(positions, dtype=np.int32) for token, positions in postings.items()}
+        self.vocabulary = sorted(self.postings)
+        self.trigram_index = defaultdict(list)
+        for token in self.vocabulary:
+            for gram in trigrams(token):
+                self.trigram_index[gram].append(token)
+
+    def _prefix_matches(self, token: str) -> list:
+        # Percorre o vocabulário a partir da primeira palavra >= token, sem copiá-lo
+        vocabulary = self.vocabulary
+        position = bisect_left(vocabulary, token)
+        matches = []
+        while position < len(vocabulary) and vocabulary[position].startswith(token):
+            matches.append(vocabulary[position])
+            position += 1
+        return matches
+
+    def _fuzzy_matches(self, token: str) -> list:
+        grams = trigrams(token)
+        shared = defaultdict(int)
+        for gram in grams:
+            for candidate in self.trigram_index.get(gram, ()):
+                shared[candidate] += 1
+        matches = []
+        for candidate, count in shared.items():
+            similarity = count / (len(grams) + len(trigrams(candidate)) - count)
+            if similarity >= MIN_SIMILARITY:
+                matches.append((candidate, similarity))
+        return matches
+
+    def _match_token(self, token: str) -> tuple:
+        """Cards que casam uma palavra da consulta: (posições em ordem crescente, pontuações).
+
+        Só os cards das listas de ocorrência casadas são tocados, nunca o deck inteiro.
+        """
+        matches = [(candidate, PREFIX_SCORE) for candidate in self._prefix_matches(token)]
+        if not matches:
+            matches = self._fuzzy_matches(token)
+        if not matches:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        postings = [self.postings[candidate] for candidate, _ in matches]
+        scores = [
+            np.full(len(positions), EXACT_SCORE if candidate == token else score, dtype=np.float32)
+            for (candidate, score), positions in zip(matches, postings)
+        ]
+        if len(matches) == 1:
+            return postings[0], scores[0]
+        positions, scores = np.concatenate(postings), np.concatenate(scores)
+        # Um card casado por várias palavras do vocabulário fica com a maior pontuação
+        order = np.lexsort((-scores, positions))
+        positions, scores = positions[order], scores[order]
+        first = np.empty(len(positions), dtype=bool)
+        first[0] = True
+        np.not_equal(positions[1:], positions[:-1], out=first[1:])
+        return positions[first], scores[first]
+
+    def search(self, query: str) -> list:
+        """Retorna as posições dos cards encontrados, da mais relevante para a menos"""
+        tokens = tokenize(query)
+        if not tokens or self.size == 0:
+            return []
+        positions, total = self._match_token(tokens[0])
+        for token in tokens[1:]:
+            # Um card precisa casar todas as palavras: interseção das posições
+            token_positions, scores = self._match_token(token)
+            positions, kept, token_kept = np.intersect1d(
+                positions, token_positions, assume_unique=True, return_indices=True
+            )
+            total = total[kept] + scores[token_kept]
+        # Ordenação estável sobre posições crescentes: empates mantêm a ordem do deck
+        order = np.argsort(-total, kind="stable")
+        return positions[order].tolist()
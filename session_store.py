@@ -0,0 +1,84 @@
+"""Sessões de revisão em andamento salvas fora da memória do Streamlit.
+
+O estado da sessão (fila, estatísticas, difíceis, tipo de sessão, deck e tags)
+é gravado como JSON compactado em um SQLite local (FLASHCARDS_SESSION_DB,
+padrão flashcards_sessions.db), sob um token que fica na URL (?session=).
+Assim a sessão continua depois de um restart do servidor, de um deploy ou em
+outro processo do Streamlit atrás de um balanceador no mesmo host.
+"""
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+import zlib
+
+SESSION_DB_PATH = os.environ.get("FLASHCARDS_SESSION_DB", "flashcards_sessions.db")
+
+# Sessões sem atividade por mais tempo que isso são descartadas
+SESSION_TTL_S = float(os.environ.get("FLASHCARDS_SESSION_TTL_DAYS", 7)) * 86400
+
+
+def new_token() -> str:
+    return secrets.token_urlsafe(16)
+
+
+class SessionStore:
+    def __init__(self, path: str = SESSION_DB_PATH, ttl_s: float = SESSION_TTL_S):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    token TEXT PRIMARY KEY,
+                    updated_at REAL NOT NULL,
+                    data BLOB NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - ttl_s,))
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, token: str, state: dict):
+        # IDs podem vir como inteiros do numpy
+        data = zlib.compress(json.dumps(state, separators=(",", ":"), default=int).encode("utf-8"))
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO sessions VALUES (?, ?, ?) "
+                "ON CONFLICT (token) DO UPDATE SET updated_at = excluded.updated_at, data = excluded.data",
+                (token, time.time(), data),
+            )
+
+    def load(self, token: str):
+        """Estado salvo da sessão, ou None se o token não existir ou o registro estiver corrompido"""
+        row = self._connection().execute("SELECT data FROM sessions WHERE token = ?", (token,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(row[0]))
+        except (zlib.error, ValueError):
+            return None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore(SESSION_DB_PATH)
+        return _store
@@ -0,0 +1,466 @@
+"""Backends de armazenamento do progresso dos flashcards.
+
+O progresso de cada usuário é um conjunto de linhas (id, date_added,
+next_appearance, ease, interval, repetitions). O backend é escolhido pela variável de ambiente
+FLASHCARDS_STORAGE ("csv" ou "sqlite").
+
+Migração única dos CSVs existentes para o SQLite:
+
+    python storage.py migrate [usuario]
+"""
+import contextlib
+import csv
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING
+from urllib.parse import quote
+
+from constants import (
+    DATE_ADDED,
+    DEFAULT_USER,
+    EASE,
+    FLASHCARDS_DB,
+    FLASHCARDS_JOURNAL,
+    FLASHCARDS_SYMBOLS_CSV,
+    ID,
+    INTERVAL,
+    NEXT_APPEARANCE,
+    REPETITIONS,
+)
+from scheduler import DEFAULT_EASE
+
+try:
+    import fcntl
+except ImportError:
+    # Fora do POSIX não há lock entre processos: só um processo deve usar o backend CSV
+    fcntl = None
+
+# O pandas só é importado pelos métodos que montam DataFrames: o cli.py lê e
+# grava o progresso como dicionários, sem pagar a importação
+if TYPE_CHECKING:
+    import pandas as pd
+
+STORAGE_BACKEND = os.environ.get("FLASHCARDS_STORAGE", "csv")
+SQLITE_PATH = os.environ.get("FLASHCARDS_SQLITE_DB", FLASHCARDS_DB)
+
+# Quantidade de revisões no journal antes de compactá-lo no snapshot CSV
+JOURNAL_COMPACT_EVERY = int(os.environ.get("FLASHCARDS_JOURNAL_COMPACT_EVERY", 500))
+
+PROGRESS_COLUMNS = [ID, DATE_ADDED, NEXT_APPEARANCE, EASE, INTERVAL, REPETITIONS]
+
+# Tamanho máximo do nome do usuário codificado (nomes de arquivo têm até 255 bytes)
+MAX_ENCODED_USER = 200
+
+# Valores do estado SM-2 para progresso salvo antes de existirem essas colunas
+SCHEDULE_DEFAULTS = {EASE: DEFAULT_EASE, INTERVAL: 0, REPETITIONS: 0}
+
+
+def file_signature(*paths: str) -> tuple:
+    """Identifica a versão atual dos arquivos pelo mtime e tamanho"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append((path, None, None))
+    return tuple(signature)
+
+
+def encode_user(user: str) -> str:
+    """Nome do usuário como trecho de nome de arquivo, codificado de forma reversível.
+
+    Usa percent-encoding: nomes diferentes nunca compartilham arquivos
+    ("a.b" e "a_b", "joão" e "jo_o"). O "@" das chaves de progresso por deck
+    fica legível. Nomes que não podem ser codificados são rejeitados com ValueError.
+    """
+    try:
+        encoded = quote(user, safe="@")
+    except UnicodeEncodeError:
+        raise ValueError(f"Nome de usuário inválido: {user!r}") from None
+    if not encoded or len(encoded) > MAX_ENCODED_USER:
+        raise ValueError(f"Nome de usuário inválido: {user!r}")
+    return encoded
+
+
+def get_empty_progress() -> "pd.DataFrame":
+    import pandas as pd
+
+    return pd.DataFrame(columns=PROGRESS_COLUMNS)
+
+
+def _progress_record(card_id, date_added, next_appearance, ease, interval, repetitions) -> dict:
+    """Progresso de um card lido de texto (CSV, journal ou SQLite), sem pandas"""
+    return {
+        ID: int(card_id),
+        DATE_ADDED: datetime.fromisoformat(date_added),
+        NEXT_APPEARANCE: datetime.fromisoformat(next_appearance),
+        EASE: float(ease),
+        INTERVAL: int(float(interval)),
+        REPETITIONS: int(float(repetitions)),
+    }
+
+
+def _fsync_directory(path: str):
+    # Sem o fsync do diretório, o rename pode se perder em uma queda de energia (POSIX)
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _progress_values(progress: dict) -> tuple:
+    # Datas como datetime ou pd.Timestamp (subclasse de datetime)
+    return (
+        progress[DATE_ADDED].isoformat(),
+        progress[NEXT_APPEARANCE].isoformat(),
+        float(progress[EASE]),
+        int(progress[INTERVAL]),
+        int(progress[REPETITIONS]),
+    )
+
+
+def _trim_torn_line(f):
+    """Corta a linha final sem quebra deixada por uma escrita interrompida.
+
+    Sem isso a próxima revisão seria colada ao fragmento e descartada na leitura.
+    """
+    if f.seek(0, os.SEEK_END) == 0:
+        return
+    f.seek(-1, os.SEEK_END)
+    if f.read(1) == b"\n":
+        return
+    # O journal é compactado periodicamente, então lê-lo inteiro é barato
+    f.seek(0)
+    f.truncate(f.read().rfind(b"\n") + 1)
+
+
+@contextlib.contextmanager
+def _journal_lock(path: str, shared: bool = False):
+    """Lock entre processos (flock) sobre o journal, que nunca é substituído, só truncado"""
+    # Sem journal ainda, uma leitura só vê o snapshot, trocado de forma atômica;
+    # assim ler o progresso de um usuário novo não cria arquivos
+    if fcntl is None or (shared and not os.path.exists(path)):
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class CsvStorage:
+    """Snapshot CSV + journal append-only por usuário.
+
+    Cada revisão acrescenta uma linha ao journal; a cada JOURNAL_COMPACT_EVERY
+    revisões o journal é aplicado ao snapshot, que é gravado de forma atômica.
+    Escritas e leituras seguram um flock no journal, então vários processos (o
+    app e o cli.py, por exemplo) podem usar os mesmos arquivos.
+    """
+
+    def __init__(self, snapshot_path: str = FLASHCARDS_SYMBOLS_CSV, journal_path: str = FLASHCARDS_JOURNAL):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self._lock = threading.Lock()
+        self._journal_entries = {}
+
+    def _paths(self, user: str) -> tuple:
+        # O usuário padrão mantém os nomes de arquivo originais
+        if user == DEFAULT_USER:
+            return self.snapshot_path, self.journal_path
+        safe_user = encode_user(user)
+        snapshot_root, snapshot_ext = os.path.splitext(self.snapshot_path)
+        journal_root, journal_ext = os.path.splitext(self.journal_path)
+        return f"{snapshot_root}.{safe_user}{snapshot_ext}", f"{journal_root}.{safe_user}{journal_ext}"
+
+    def signature(self, user: str) -> tuple:
+        return file_signature(*self._paths(user))
+
+    def _write_snapshot(self, path: str, progress_df: "pd.DataFrame"):
+        # Escreve em um arquivo temporário e troca atomicamente, para que uma queda
+        # no meio da escrita nunca deixe o snapshot truncado. O nome é único: outro
+        # processo gravando o mesmo snapshot não trunca o nosso arquivo temporário
+        directory, name = os.path.split(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f"{name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", newline="") as f:
+                progress_df.to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        _fsync_directory(path)
+
+    def _read_journal_records(self, path: str) -> list:
+        """Lê as revisões registradas no journal desde o último snapshot"""
+        records = []
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    # Uma linha sem quebra final é uma escrita interrompida: descartar
+                    if not line.endswith("\n"):
+                        break
+                    fields = line.rstrip("\n").split(",")
+                    # Linhas antigas têm só as datas
+                    if len(fields) == 3:
+                        fields += [SCHEDULE_DEFAULTS[EASE], SCHEDULE_DEFAULTS[INTERVAL], SCHEDULE_DEFAULTS[REPETITIONS]]
+                    try:
+                        records.append(_progress_record(*fields))
+                    except (ValueError, TypeError):
+                        continue
+        return records
+
+    def _read_journal(self, path: str) -> "pd.DataFrame":
+        import pandas as pd
+
+        return pd.DataFrame(self._read_journal_records(path), columns=PROGRESS_COLUMNS)
+
+    def load_progress(self, user: str = DEFAULT_USER) -> "pd.DataFrame":
+        """Carrega o progresso salvo: snapshot CSV + revisões do journal"""
+        # Lock compartilhado: uma compactação não troca o snapshot entre as duas leituras
+        with _journal_lock(self._paths(user)[1], shared=True):
+            return self._load_progress(user)
+
+    def _load_progress(self, user: str) -> "pd.DataFrame":
+        import pandas as pd
+
+        snapshot_path, journal_path = self._paths(user)
+        progress_df = get_empty_progress()
+        if os.path.exists(snapshot_path):
+            progress_df = pd.read_csv(snapshot_path, usecols=lambda column: column in PROGRESS_COLUMNS)
+            for column, default in SCHEDULE_DEFAULTS.items():
+                if column not in progress_df:
+                    progress_df[column] = default
+            progress_df[DATE_ADDED] = pd.to_datetime(progress_df[DATE_ADDED])
+            progress_df[NEXT_APPEARANCE] = pd.to_datetime(progress_df[NEXT_APPEARANCE])
+
+        journal_df = self._read_journal(journal_path)
+        if not journal_df.empty:
+            # A revisão mais recente de cada card prevalece
+            if progress_df.empty:
+                progress_df = journal_df
+            else:
+                progress_df = pd.concat([progress_df, journal_df], ignore_index=True)
+            progress_df = progress_df.drop_duplicates(subset=ID, keep="last")
+        return progress_df[PROGRESS_COLUMNS]
+
+    def load_records(self, user: str = DEFAULT_USER) -> dict:
+        """Progresso salvo como {id: progresso}, lido sem pandas"""
+        snapshot_path, journal_path = self._paths(user)
+        records = {}
+        with _journal_lock(journal_path, shared=True):
+            if os.path.exists(snapshot_path):
+                with open(snapshot_path, newline="") as f:
+                    for row in csv.DictReader(f):
+                        # Snapshots antigos não têm as colunas do estado SM-2
+                        values = {**SCHEDULE_DEFAULTS, **{column: value for column, value in row.items() if value}}
+                        try:
+                            record = _progress_record(*(values[column] for column in PROGRESS_COLUMNS))
+                        except (KeyError, ValueError):
+                            continue
+                        records[record[ID]] = record
+            # A revisão mais recente de cada card prevalece
+            for record in self._read_journal_records(journal_path):
+                records[record[ID]] = record
+        return records
+
+    def save_progress(self, progress_df: "pd.DataFrame", user: str = DEFAULT_USER):
+        """Grava o progresso completo no snapshot e esvazia o journal"""
+        snapshot_path, journal_path = self._paths(user)
+        with self._lock, _journal_lock(journal_path):
+            self._write_snapshot(snapshot_path, progress_df[PROGRESS_COLUMNS])
+            self._truncate_journal(journal_path)
+            self._journal_entries[user] = 0
+
+    def _truncate_journal(self, path: str):
+        # Só é chamado depois que o snapshot já contém todas as revisões.
+        # Se o processo cair antes disso, o replay do journal é idempotente.
+        with open(path, "w") as f:
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_review(self, card_id: int, progress: dict, user: str = DEFAULT_USER):
+        """Registra uma revisão no journal, sem reescrever o arquivo de progresso"""
+        self.record_reviews({card_id: progress}, user)
+
+    def record_reviews(self, reviews: dict, user: str = DEFAULT_USER):
+        """Registra várias revisões ({id: progresso}) no journal com uma única escrita e fsync"""
+        _, journal_path = self._paths(user)
+        lines = "".join(
+            ",".join(str(value) for value in (int(card_id), *_progress_values(progress))) + "\n"
+            for card_id, progress in reviews.items()
+        )
+        with self._lock, _journal_lock(journal_path):
+            if user not in self._journal_entries:
+                self._journal_entries[user] = len(self._read_journal_records(journal_path))
+            with open(journal_path, "a+b") as f:
+                _trim_torn_line(f)
+                f.write(lines.encode())
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_entries[user] += len(reviews)
+            should_compact = self._journal_entries[user] >= JOURNAL_COMPACT_EVERY
+        if should_compact:
+            self.compact(user)
+
+    def compact(self, user: str = DEFAULT_USER):
+        """Aplica o journal sobre o snapshot CSV e esvazia o journal"""
+        snapshot_path, journal_path = self._paths(user)
+        with self._lock, _journal_lock(journal_path):
+            progress_df = self._load_progress(user)
+            if not progress_df.empty:
+                self._write_snapshot(snapshot_path, progress_df)
+            self._truncate_journal(journal_path)
+            self._journal_entries[user] = 0
+
+
+class SqliteStorage:
+    """Progresso por (usuário, card) em SQLite no modo WAL.
+
+    Cada revisão é um upsert de uma única linha pela chave primária, de modo
+    que sessões simultâneas não sobrescrevem o progresso umas das outras.
+    """
+
+    _UPSERT = """
+        INSERT INTO progress (user, card_id, date_added, next_appearance, ease, interval, repetitions)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user, card_id) DO UPDATE SET
+            date_added = excluded.date_added,
+            next_appearance = excluded.next_appearance,
+            ease = excluded.ease,
+            interval = excluded.interval,
+            repetitions = excluded.repetitions
+    """
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS progress (
+                    user TEXT NOT NULL,
+                    card_id INTEGER NOT NULL,
+                    date_added TEXT NOT NULL,
+                    next_appearance TEXT NOT NULL,
+                    ease REAL NOT NULL DEFAULT {DEFAULT_EASE},
+                    interval INTEGER NOT NULL DEFAULT 0,
+                    repetitions INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (user, card_id)
+                ) WITHOUT ROWID
+                """
+            )
+            # Bancos criados antes do estado SM-2 ganham as colunas novas
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(progress)")}
+            for column, definition in (
+                (EASE, f"REAL NOT NULL DEFAULT {DEFAULT_EASE}"),
+                (INTERVAL, "INTEGER NOT NULL DEFAULT 0"),
+                (REPETITIONS, "INTEGER NOT NULL DEFAULT 0"),
+            ):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE progress ADD COLUMN {column} {definition}")
+
+    def _connection(self) -> sqlite3.Connection:
+        # Uma conexão por thread: o Streamlit atende cada sessão em uma thread própria
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def signature(self, user: str) -> tuple:
+        return file_signature(self.path, f"{self.path}-wal")
+
+    def load_progress(self, user: str = DEFAULT_USER) -> "pd.DataFrame":
+        import pandas as pd
+
+        progress_df = pd.read_sql_query(
+            f"SELECT card_id AS {ID}, date_added AS {DATE_ADDED}, next_appearance AS {NEXT_APPEARANCE}, "
+            f"{EASE}, {INTERVAL}, {REPETITIONS} FROM progress WHERE user = ?",
+            self._connection(),
+            params=(user,),
+        )
+        progress_df[DATE_ADDED] = pd.to_datetime(progress_df[DATE_ADDED])
+        progress_df[NEXT_APPEARANCE] = pd.to_datetime(progress_df[NEXT_APPEARANCE])
+        return progress_df
+
+    def load_records(self, user: str = DEFAULT_USER) -> dict:
+        """Progresso salvo como {id: progresso}, lido sem pandas"""
+        rows = self._connection().execute(
+            f"SELECT card_id, date_added, next_appearance, {EASE}, {INTERVAL}, {REPETITIONS} FROM progress WHERE user = ?",
+            (user,),
+        )
+        return {row[0]: _progress_record(*row) for row in rows}
+
+    def save_progress(self, progress_df: "pd.DataFrame", user: str = DEFAULT_USER):
+        """Grava várias linhas de progresso em uma única transação"""
+        rows = (
+            (user, int(progress[ID]), *_progress_values(progress))
+            for progress in progress_df[PROGRESS_COLUMNS].to_dict("records")
+        )
+        conn = self._connection()
+        with conn:
+            conn.executemany(self._UPSERT, rows)
+
+    def record_review(self, card_id: int, progress: dict, user: str = DEFAULT_USER):
+        conn = self._connection()
+        with conn:
+            conn.execute(self._UPSERT, (user, int(card_id), *_progress_values(progress)))
+
+    def record_reviews(self, reviews: dict, user: str = DEFAULT_USER):
+        """Grava várias revisões ({id: progresso}) em uma única transação"""
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                self._UPSERT,
+                ((user, int(card_id), *_progress_values(progress)) for card_id, progress in reviews.items()),
+            )
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Retorna o backend configurado em FLASHCARDS_STORAGE"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if STORAGE_BACKEND == "sqlite":
+                _storage = SqliteStorage(SQLITE_PATH)
+            elif STORAGE_BACKEND == "csv":
+                _storage = CsvStorage()
+            else:
+                raise ValueError(f"Backend de armazenamento desconhecido: {STORAGE_BACKEND}")
+        return _storage
+
+
+def migrate_csv_to_sqlite(user: str = DEFAULT_USER, sqlite_path: str = SQLITE_PATH) -> int:
+    """Copia o progresso dos CSVs (snapshot + journal) para o SQLite"""
+    progress_df = CsvStorage().load_progress(user)
+    if not progress_df.empty:
+        SqliteStorage(sqlite_path).save_progress(progress_df, user)
+    return len(progress_df)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "migrate":
+        print(__doc__)
+        sys.exit(1)
+    migrate_user = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_USER
+    count = migrate_csv_to_sqlite(migrate_user)
+    print(f"{count} cards migrados para {SQLITE_PATH} (usuário '{migrate_user}')")
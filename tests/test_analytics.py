@@ -0,0 +1,47 @@
+"""Histórico de revisões: agregados por card, por dia e por faixa da curva de retenção."""
+from datetime import datetime, timedelta
+
+import pytest
+
+from analytics import ReviewHistory, elapsed_bucket, review_event
+
+DAY = datetime(2026, 3, 10, 9, 0)
+
+
+@pytest.fixture
+def history(tmp_path):
+    return ReviewHistory(str(tmp_path / "analytics.db"))
+
+
+def test_elapsed_buckets_double():
+    assert [elapsed_bucket(days) for days in (0, 1, 2, 3, 4, 7, 8, 20)] == [0, 1, 2, 2, 4, 4, 8, 16]
+
+
+def test_record_updates_every_rollup(history):
+    history.record(
+        [
+            review_event(1, "hard", DAY, None, 1),
+            review_event(1, "medium", DAY + timedelta(days=1), DAY, 1),
+            review_event(2, "easy", DAY + timedelta(days=1), DAY - timedelta(days=5), 6),
+        ],
+        user="ana",
+    )
+    history.record([review_event(1, "hard", DAY + timedelta(days=3, hours=1), DAY + timedelta(days=1), 1)], user="ana")
+    history.record([review_event(1, "easy", DAY, None, 1)], user="bia")
+
+    assert history.totals("ana") == {"reviews": 4, "hard": 2, "cards": 2}
+    assert history.totals("bia") == {"reviews": 1, "hard": 0, "cards": 1}
+    # Mais difícil: só cards com revisões suficientes para o ranking
+    hardest = history.hardest_cards("ana")
+    assert hardest["card_id"].tolist() == [1]
+    assert hardest["hard_rate"].tolist() == [pytest.approx(2 / 3)]
+
+    daily = history.daily_stats("ana")
+    assert daily["day"].tolist() == ["2026-03-10", "2026-03-11", "2026-03-13"]
+    assert daily[["reviews", "easy", "medium", "hard"]].values.tolist() == [[1, 0, 0, 1], [2, 1, 1, 0], [1, 0, 0, 1]]
+
+    # Cards nunca revisados não entram na curva de retenção
+    retention = history.retention("ana")
+    assert retention["elapsed_days"].tolist() == [1, 2, 4]
+    assert retention["reviews"].tolist() == [1, 1, 1]
+    assert retention["retention"].tolist() == [1.0, 0.0, 1.0]
@@ -0,0 +1,65 @@
+"""Importação de cards: duplicados, caminhos relativos ao deck e ZIPs corrompidos."""
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+from PIL import Image
+
+from deck_import import import_deck
+
+
+def _save_image(path, color: str):
+    Image.new("RGB", (4, 4), color).save(path)
+
+
+@pytest.fixture
+def deck_path(tmp_path, monkeypatch):
+    # Deck fora do diretório atual, com uma imagem
+    os.makedirs(tmp_path / "deck" / "images")
+    _save_image(tmp_path / "deck" / "images" / "red.png", "red")
+    (tmp_path / "deck" / "database.csv").write_text("question,answer,id\r\nimages/red.png,Red,1\r\n")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / "deck" / "database.csv"
+
+
+def test_known_images_are_neither_imported_nor_written(tmp_path, deck_path):
+    _save_image(tmp_path / "red_copy.png", "red")
+    _save_image(tmp_path / "blue.png", "blue")
+    (tmp_path / "new.csv").write_text("question,answer\nred_copy.png,Red\nblue.png,Blue\nblue.png,Blue\n")
+    images_dir = deck_path.parent / "images"
+
+    counts = import_deck(str(tmp_path / "new.csv"), str(deck_path), str(images_dir), workers=1)
+
+    assert counts == {"imported": 1, "duplicates": 2, "invalid": 0}
+    # Só a imagem azul é gravada, e o caminho no deck é relativo à pasta do deck
+    assert len(os.listdir(images_dir)) == 2
+    deck_df = pd.read_csv(deck_path)
+    assert deck_df["id"].tolist() == [1, 2]
+    assert (deck_path.parent / deck_df["question"].iloc[1]).exists()
+
+
+def test_corrupted_zip_member_is_invalid(tmp_path, deck_path):
+    _save_image(tmp_path / "blue.png", "blue")
+    with zipfile.ZipFile(tmp_path / "cards.zip", "w") as archive:
+        archive.write(tmp_path / "blue.png", "1_blue.png")
+    data = bytearray((tmp_path / "cards.zip").read_bytes())
+    data[data.find(b"IDAT") + 6] ^= 0xFF
+    (tmp_path / "cards.zip").write_bytes(data)
+
+    counts = import_deck(str(tmp_path / "cards.zip"), str(deck_path), str(deck_path.parent / "images"), workers=1)
+
+    assert counts == {"imported": 0, "duplicates": 0, "invalid": 1}
+
+
+def test_failed_import_leaves_deck_untouched(tmp_path, deck_path):
+    # Fim do diretório central apontando para fora do arquivo
+    eocd = b"PK\x05\x06" + b"\0" * 4 + (1).to_bytes(2, "little") * 2 + (46).to_bytes(4, "little")
+    (tmp_path / "bad.zip").write_bytes(eocd + (500).to_bytes(4, "little") + b"\0\0")
+    before = deck_path.read_bytes()
+
+    with pytest.raises(zipfile.BadZipFile):
+        import_deck(str(tmp_path / "bad.zip"), str(deck_path), str(deck_path.parent / "images"), workers=1)
+
+    assert deck_path.read_bytes() == before
+    assert sorted(os.listdir(deck_path.parent)) == ["database.csv", "images"]
@@ -0,0 +1,17 @@
+"""Chaves de progresso por usuário e deck."""
+import pytest
+
+from decks import DEFAULT_DECK, progress_key
+from storage import CsvStorage
+
+
+def test_progress_keys_of_users_and_decks_never_collide(tmp_path):
+    storage = CsvStorage(str(tmp_path / "progress.csv"), str(tmp_path / "progress.journal"))
+    keys = [progress_key("alice", "flashcards"), progress_key("alice_flashcards", DEFAULT_DECK)]
+    assert keys[0] != keys[1]
+    assert storage._paths(keys[0]) != storage._paths(keys[1])
+
+
+def test_user_names_cannot_contain_the_deck_separator():
+    with pytest.raises(ValueError):
+        progress_key("alice@flashcards", DEFAULT_DECK)
@@ -0,0 +1,76 @@
+"""Regressão do merge_progress: o join por ID deve reproduzir o merge antigo com iterrows()."""
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from constants import DATE_ADDED, ID, NEXT_APPEARANCE
+from utils import build_card_schedule, merge_progress
+
+NOW = datetime(2026, 1, 15, 12, 0)
+
+
+def merge_progress_iterrows(df: pd.DataFrame, progress_df: pd.DataFrame) -> pd.DataFrame:
+    # Implementação original de load_all_flashcards
+    for _, progress_row in progress_df.iterrows():
+        mask = df[ID] == progress_row[ID]
+        if mask.any():
+            df.loc[mask, NEXT_APPEARANCE] = progress_row[NEXT_APPEARANCE]
+            df.loc[mask, DATE_ADDED] = progress_row[DATE_ADDED]
+    return df
+
+
+def make_deck(n_cards: int) -> pd.DataFrame:
+    df = pd.DataFrame({ID: range(1, n_cards + 1)})
+    df[DATE_ADDED] = pd.to_datetime(NOW)
+    df[NEXT_APPEARANCE] = pd.to_datetime(NOW - timedelta(days=1))
+    return df
+
+
+def make_progress(rows: list) -> pd.DataFrame:
+    progress_df = pd.DataFrame(rows, columns=[ID, DATE_ADDED, NEXT_APPEARANCE])
+    progress_df[DATE_ADDED] = pd.to_datetime(progress_df[DATE_ADDED])
+    progress_df[NEXT_APPEARANCE] = pd.to_datetime(progress_df[NEXT_APPEARANCE])
+    return progress_df
+
+
+def day(n: int) -> datetime:
+    return NOW + timedelta(days=n)
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [
+        # Cards sem progresso salvo mantêm os valores padrão
+        [(2, day(-30), day(3)), (5, day(-10), day(7))],
+        # Linhas de IDs que não existem mais no deck são ignoradas
+        [(1, day(-5), day(2)), (99, day(-1), day(9)), (0, day(-2), day(4))],
+        # IDs repetidos: a última linha prevalece
+        [(3, day(-8), day(1)), (4, day(-6), day(5)), (3, day(-7), day(11))],
+    ],
+    ids=["missing_progress", "unknown_ids", "duplicate_ids"],
+)
+def test_merge_progress_matches_iterrows(rows):
+    progress_df = make_progress(rows)
+    expected = merge_progress_iterrows(make_deck(6), progress_df)
+    merged = merge_progress(make_deck(6), progress_df)
+    pd.testing.assert_frame_equal(merged, expected)
+
+
+def test_merge_progress_keeps_defaults_without_progress():
+    merged = merge_progress(make_deck(3), make_progress([(2, day(-30), day(3))]))
+    defaults = merged[merged[ID] != 2]
+    assert (defaults[DATE_ADDED] == pd.Timestamp(NOW)).all()
+    assert (defaults[NEXT_APPEARANCE] == pd.Timestamp(NOW - timedelta(days=1))).all()
+
+
+def test_merge_progress_last_duplicate_wins():
+    merged = merge_progress(make_deck(3), make_progress([(3, day(-8), day(1)), (3, day(-7), day(11))]))
+    assert merged.loc[merged[ID] == 3, NEXT_APPEARANCE].item() == pd.Timestamp(day(11))
+
+
+def test_missing_progress_dates_are_due_now():
+    # NaT não pode virar o menor int64 nos arrays da sessão
+    schedule = build_card_schedule(make_deck(2)[[ID]], make_progress([(1, None, None)]))
+    assert schedule.get(0)[NEXT_APPEARANCE] == datetime(1970, 1, 1)
+    assert schedule.get(1)[NEXT_APPEARANCE] < datetime.now()
@@ -0,0 +1,108 @@
+"""Agendamento: progressão SM-2, fila de revisão, limite diário e datas ausentes (NaT)."""
+from array import array
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+import streamlit as st
+
+import utils
+from constants import ID
+from scheduler import (
+    DAILY_REVIEW_LIMIT,
+    DEFAULT_EASE,
+    MAX_INTERVAL_DAYS,
+    MIN_EASE,
+    MISSING_DATE_MICROS,
+    NAT_MICROS,
+    CardSchedule,
+    ReviewQueue,
+    from_micros,
+    next_review,
+    next_serving_date,
+    to_micros,
+)
+
+NOW = datetime(2026, 3, 10, 15, 30)
+
+
+def test_correct_answers_grow_the_interval():
+    # 1 dia, 6 dias e depois o intervalo anterior vezes a facilidade
+    ease, interval, repetitions, next_appearance = next_review(DEFAULT_EASE, 0, 0, "medium", NOW)
+    assert (ease, interval, repetitions) == (pytest.approx(DEFAULT_EASE), 1, 1)
+    assert next_appearance == NOW + timedelta(days=1)
+    ease, interval, repetitions, _ = next_review(ease, interval, repetitions, "medium", NOW)
+    assert (interval, repetitions) == (6, 2)
+    ease, interval, repetitions, _ = next_review(ease, interval, repetitions, "easy", NOW)
+    assert (ease, interval, repetitions) == (pytest.approx(DEFAULT_EASE + 0.1), 15, 3)
+
+
+def test_hard_answer_restarts_and_lowers_the_ease():
+    ease, interval, repetitions, next_appearance = next_review(DEFAULT_EASE, 15, 3, "hard", NOW)
+    assert (ease, interval, repetitions) == (pytest.approx(DEFAULT_EASE - 0.32), 1, 0)
+    assert next_appearance == NOW + timedelta(days=1)
+
+
+def test_ease_and_interval_bounds():
+    assert next_review(MIN_EASE, 1, 0, "hard", NOW)[0] == MIN_EASE
+    assert next_review(DEFAULT_EASE, 300, 5, "easy", NOW)[1] == MAX_INTERVAL_DAYS
+
+
+def test_next_due_date_within_the_daily_limit():
+    assert next_serving_date(NOW + timedelta(days=2), 0, NOW) == NOW + timedelta(days=2)
+    assert next_serving_date(NOW - timedelta(days=1), DAILY_REVIEW_LIMIT - 1, NOW) == NOW - timedelta(days=1)
+
+
+def test_overdue_cards_wait_for_tomorrow_once_the_limit_is_used():
+    assert next_serving_date(NOW - timedelta(days=1), DAILY_REVIEW_LIMIT, NOW) == datetime(2026, 3, 11)
+    # Um vencimento depois de amanhã não é antecipado
+    assert next_serving_date(NOW + timedelta(days=3), DAILY_REVIEW_LIMIT, NOW) == NOW + timedelta(days=3)
+
+
+def test_missing_dates_are_due_now():
+    assert from_micros(NAT_MICROS) == from_micros(MISSING_DATE_MICROS) == datetime(1970, 1, 1)
+
+
+def test_due_queue_keeps_the_oldest_cards_up_to_the_limit():
+    due_times = [5, 1, 9, 3, 7, 2]
+    queue = ReviewQueue.due([10, 11, 12, 13, 14, 15], due_times, now=7, limit=3)
+
+    # O card 12 (vencimento 9) ainda não venceu; dos vencidos, ficam os 3 mais antigos
+    assert len(queue) == 3
+    assert queue.upcoming(5) == [11, 15, 13]
+    assert [queue.pop() for _ in range(4)] == [11, 15, 13, None]
+
+
+def test_upcoming_and_restore_keep_the_heap_order():
+    # IDs 0 a 19 vencendo de 19 a 0: o ID 19 é o mais antigo
+    queue = ReviewQueue(zip(range(20), reversed(range(20))))
+    queue.push(100, 2.5)
+
+    assert queue.upcoming(5) == [19, 18, 17, 100, 16]
+    assert queue.peek() == 19
+    restored = ReviewQueue.restore(queue.snapshot())
+    # Mesmos desempates: a fila recriada sai na mesma ordem
+    assert [restored.pop() for _ in range(len(restored))] == [queue.pop() for _ in range(len(queue))]
+
+
+def test_queue_respects_what_is_left_of_the_daily_limit(monkeypatch):
+    monkeypatch.setattr(utils, "DAILY_REVIEW_LIMIT", 4)
+    yesterday, today = to_micros(NOW - timedelta(days=1)), to_micros(datetime.now())
+    tomorrow = to_micros(datetime.now() + timedelta(days=1))
+    # 3 cards revisados hoje (vencem amanhã, intervalo de 1 dia) e 2 vencidos
+    next_appearance = [tomorrow, tomorrow, tomorrow, today - 1, yesterday]
+    intervals = [1, 1, 1, 0, 0]
+    st.session_state.schedule = CardSchedule(
+        array("q", [0] * 5),
+        array("q", next_appearance),
+        array("f", [DEFAULT_EASE] * 5),
+        array("i", intervals),
+        array("H", [0] * 5),
+    )
+    st.session_state.deck_content = pd.DataFrame({ID: [1, 2, 3, 4, 5]})
+    st.session_state.tag_filter = None
+
+    utils.initialize_question_queue()
+
+    # Só resta 1 revisão hoje: entra o vencimento mais antigo
+    assert st.session_state.question_queue.upcoming(5) == [5]
@@ -0,0 +1,34 @@
+"""Busca nos cards: acentos e maiúsculas, erros de digitação, todas as palavras e ordem de relevância."""
+from search_index import SearchIndex
+
+TEXTS = [
+    "Água é composta por hidrogênio e oxigênio",
+    "O hidrante fica na esquina",
+    "aguardente de cana",
+    "Ácido sulfúrico",
+]
+
+
+def test_accents_and_case_are_ignored():
+    index = SearchIndex(TEXTS)
+    assert index.search("agua") == index.search("ÁGUA") == [0, 2]
+    assert index.search("acido SULFURICO") == [3]
+
+
+def test_typos_match_similar_words():
+    assert SearchIndex(TEXTS).search("hidrnte") == [1]
+
+
+def test_every_query_word_must_match():
+    index = SearchIndex(TEXTS)
+    assert index.search("agua oxigenio") == [0]
+    assert index.search("agua esquina") == []
+    assert index.search("") == []
+
+
+def test_exact_matches_rank_before_prefixes():
+    # "agua" é prefixo de "aguardente": o card com a palavra exata vem antes, mesmo estando depois
+    index = SearchIndex(["aguardente de cana", "a água da cana"])
+    assert index.search("agua") == [1, 0]
+    # Empates mantêm a ordem do deck
+    assert index.search("cana") == [0, 1]
@@ -0,0 +1,89 @@
+"""Arquivos do backend CSV por usuário e journal após uma escrita interrompida."""
+import multiprocessing
+import os
+from datetime import datetime
+
+import pytest
+
+from constants import DEFAULT_USER
+from storage import CsvStorage, encode_user, fcntl
+
+PROGRESS = {
+    "date_added": datetime(2026, 1, 1),
+    "next_appearance": datetime(2026, 2, 1),
+    "ease": 2.5,
+    "interval": 3,
+    "repetitions": 1,
+}
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return CsvStorage(str(tmp_path / "progress.csv"), str(tmp_path / "progress.journal"))
+
+
+def test_users_never_share_files(storage):
+    users = [DEFAULT_USER, "a.b", "a_b", "joão", "jo_o", "x/y", "x%2Fy"]
+    paths = [storage._paths(user) for user in users]
+    assert len(set(paths)) == len(users)
+
+
+@pytest.mark.parametrize("user", ["", "\udc80", "x" * 300])
+def test_unencodable_users_are_rejected(user):
+    with pytest.raises(ValueError):
+        encode_user(user)
+
+
+def test_progress_is_kept_per_user(storage):
+    storage.record_review(1, PROGRESS, "a.b")
+    storage.record_review(2, PROGRESS, "a_b")
+    assert list(storage.load_records("a.b")) == [1]
+    assert list(storage.load_records("a_b")) == [2]
+
+
+def test_append_after_torn_line_keeps_review(storage):
+    storage.record_review(1, PROGRESS)
+    with open(storage.journal_path, "a") as f:
+        f.write("2,2026-01-01T00:0")
+    CsvStorage(storage.snapshot_path, storage.journal_path).record_review(3, PROGRESS)
+    assert sorted(storage.load_records()) == [1, 3]
+    assert sorted(storage.load_progress()["id"]) == [1, 3]
+
+
+def test_failed_snapshot_write_keeps_previous_snapshot(storage, tmp_path):
+    storage.record_review(1, PROGRESS)
+    storage.compact()
+    before = open(storage.snapshot_path).read()
+
+    class BrokenFrame:
+        def to_csv(self, f, index):
+            f.write("id,date_added\n1,")
+            raise OSError("disco cheio")
+
+    with pytest.raises(OSError):
+        storage._write_snapshot(storage.snapshot_path, BrokenFrame())
+    assert open(storage.snapshot_path).read() == before
+    assert sorted(os.listdir(tmp_path)) == ["progress.csv", "progress.journal"]
+
+
+def _record_many(snapshot_path: str, journal_path: str, first_id: int):
+    storage = CsvStorage(snapshot_path, journal_path)
+    for card_id in range(first_id, first_id + 100):
+        storage.record_review(card_id, PROGRESS)
+
+
+@pytest.mark.skipif(fcntl is None, reason="lock entre processos só existe no POSIX")
+def test_processes_sharing_files_keep_every_review(storage, monkeypatch):
+    # Compactações frequentes: os processos trocam o snapshot enquanto o outro grava
+    monkeypatch.setattr("storage.JOURNAL_COMPACT_EVERY", 5)
+    context = multiprocessing.get_context("fork")
+    processes = [
+        context.Process(target=_record_many, args=(storage.snapshot_path, storage.journal_path, first_id))
+        for first_id in (1, 1001)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert [process.exitcode for process in processes] == [0, 0]
+    assert len(storage.load_records()) == 200
@@ -0,0 +1,69 @@
+"""Ações agendadas na fila write-behind só rodam depois das revisões gravadas."""
+import pytest
+
+from write_behind import WriteBehindQueue
+
+
+class FakeStorage:
+    def __init__(self, log: list):
+        self.log = log
+        self.fail = False
+
+    def record_reviews(self, reviews: dict, user: str):
+        if self.fail:
+            raise OSError("disco cheio")
+        self.log.append(("reviews", user, sorted(reviews)))
+
+    def record(self, events: list, user: str):
+        self.log.append(("events", user, len(events)))
+
+
+@pytest.fixture
+def log():
+    return []
+
+
+@pytest.fixture
+def queue(log):
+    storage = FakeStorage(log)
+    # Intervalo longo: só flush() explícito grava
+    return WriteBehindQueue(storage, storage, interval_s=3600, batch_size=1000)
+
+
+def test_action_runs_after_the_reviews_it_follows(queue, log):
+    queue.put(1, {}, "ana", event=("e",))
+    queue.put_after("ana", "sessao", lambda: log.append(("session", 1)))
+    queue.put_after("ana", "sessao", lambda: log.append(("session", 2)))
+    assert log == []
+
+    queue.flush("ana")
+
+    # Só a última ação da chave roda, depois do progresso e do histórico
+    assert log == [("reviews", "ana", [1]), ("events", "ana", 1), ("session", 2)]
+
+
+def test_action_waits_for_a_failed_write(queue, log):
+    queue.storage.fail = True
+    queue.put(1, {}, "ana")
+    queue.put_after("ana", "sessao", lambda: log.append("session"))
+    with pytest.raises(OSError):
+        queue.flush()
+    assert log == []
+
+    queue.storage.fail = False
+    queue.flush()
+    assert log == [("reviews", "ana", [1]), "session"]
+
+
+def test_one_pending_action_per_key_across_users(queue, log):
+    # A sessão "tok" revisou no deck "a" e depois trocou para o deck "b"
+    queue.put(1, {}, "a")
+    queue.put_after("a", "tok", lambda: log.append(("session", "a")))
+    queue.put(2, {}, "b")
+    queue.put_after("b", "tok", lambda: log.append(("session", "b")))
+
+    queue.flush()
+
+    # Só a sessão mais nova é salva, depois das revisões do seu deck
+    assert [entry for entry in log if entry[0] == "session"] == [("session", "b")]
+    assert log.index(("session", "b")) > log.index(("reviews", "b", [2]))
@@ -1,61 +1,251 @@
+import itertools
 import os
 import random
-from datetime import datetime, timedelta
+from array import array
+from datetime import datetime
+from functools import partial
 from typing import Callable
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
-DATABASE_CSV = "database.csv"
-FLASHCARDS_SYMBOLS_CSV = "flashcards_symbols.csv"
-
-ID = "id"
-QUESTION = "question"
-ANSWER = "answer"
-DATE_ADDED = "date_added"
-NEXT_APPEARANCE = "next_appearance"
-TAGS = "tags"
+import metrics
+import write_behind
+from analytics import get_review_history, review_event
+from constants import (
+    ANSWER,
+    DATE_ADDED,
+    DEFAULT_USER,
+    EASE,
+    FLASHCARDS_JOURNAL,
+    FLASHCARDS_SYMBOLS_CSV,
+    ID,
+    INTERVAL,
+    NEXT_APPEARANCE,
+    QUESTION,
+    REPETITIONS,
+    TAGS,
+)
+from deck_snapshot import load_snapshot
+from decks import (
+    DECK_CACHE_ENTRIES,
+    DECKS,
+    DEFAULT_DECK,
+    TAG_SEPARATOR,
+    Deck,
+    check_user,
+    get_deck,
+    progress_key,
+)
+from export import EXPORT_FORMATS, available_formats, get_export_file
+from image_cache import load_image
+from scheduler import (
+    DAILY_REVIEW_LIMIT,
+    MISSING_DATE_MICROS,
+    NAT_MICROS,
+    CardSchedule,
+    ReviewQueue,
+    apply_review,
+    from_micros,
+    last_reviewed,
+    new_card_progress,
+    next_serving_date,
+    to_micros,
+)
+from search_index import SearchIndex
+from session_store import get_session_store, new_token
+from storage import encode_user, file_signature, get_storage
 
 N_CARDS_PER_ROW = 2
 
+# Resultados de busca exibidos por página
+SEARCH_PAGE_SIZE = int(os.environ.get("FLASHCARDS_SEARCH_PAGE_SIZE", 20))
+
+# Contador do processo que identifica cada versão do deck de cada sessão
+_deck_versions = itertools.count(1)
+
 
 def get_empty_df():
     return pd.DataFrame(columns=[ID, QUESTION, ANSWER, DATE_ADDED, NEXT_APPEARANCE, TAGS])
 
 
-def save_flashcards(flashcards_df: pd.DataFrame):
+def save_flashcards(flashcards_df: pd.DataFrame, user: str = DEFAULT_USER):
     # Salva o progresso dos flashcards com as datas de próxima aparição
     if not flashcards_df.empty:
-        flashcards_df.to_csv(FLASHCARDS_SYMBOLS_CSV, index=False)
+        with metrics.span("save_flashcards"):
+            get_storage().save_progress(flashcards_df, user)
+        metrics.increment("full_saves")
+
+
+def record_review(id: int, progress: dict, user: str = DEFAULT_USER, event: tuple = None):
+    """Registra uma única revisão, gravada em segundo plano pela fila write-behind"""
+    write_behind.enqueue_review(id, progress, user, event)
+
+
+def flush_reviews(user: str = None):
+    """Grava agora as revisões ainda pendentes na fila write-behind"""
+    write_behind.flush(user)
+
+
+def load_progress(user: str = DEFAULT_USER) -> pd.DataFrame:
+    """Carrega o progresso salvo do usuário, incluindo as revisões ainda pendentes"""
+    flush_reviews(user)
+    storage = get_storage()
+    return load_snapshot(f"progress.{user}", storage.signature(user), lambda: storage.load_progress(user))
+
+
+def get_current_user() -> str:
+    """Usuário da sessão, informado por ?user= na URL; nomes inválidos interrompem a página"""
+    user = st.query_params.get("user") or DEFAULT_USER
+    try:
+        encode_user(check_user(user))
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+    return user
+
+
+def merge_progress(df: pd.DataFrame, progress_df: pd.DataFrame) -> pd.DataFrame:
+    """Aplica o progresso salvo sobre o deck com um único join por ID.
+
+    Cards sem progresso mantêm os valores padrão e linhas de progresso de IDs
+    que não existem mais no deck são ignoradas.
+    """
+    progress = progress_df.drop_duplicates(subset=ID, keep="last").set_index(ID)
+    has_progress = df[ID].isin(progress.index)
+    for column in progress.columns.intersection(df.columns):
+        saved = df[ID].map(progress[column])
+        df[column] = df[column].where(~has_progress, saved)
+    return df
+
 
+CONTENT_COLUMNS = [QUESTION, ANSWER, ID, TAGS]
 
-def load_all_flashcards():
-    # Carrega a base de dados das imagens e denominações
-    if os.path.exists(DATABASE_CSV):
-        df = pd.read_csv(DATABASE_CSV)
+
+def read_deck_content(deck: Deck = DECKS[DEFAULT_DECK]) -> pd.DataFrame:
+    """Lê o conteúdo imutável dos cards (pergunta ou imagem, resposta, ID e tags).
+
+    Vem do snapshot binário do deck enquanto o CSV não muda.
+    """
+    if not os.path.exists(deck.path):
+        return get_empty_df()[CONTENT_COLUMNS]
+    return load_snapshot(f"deck.{deck.name}", (deck_signature(deck), deck.default_tag), lambda: _read_deck_csv(deck))
+
+
+def _read_deck_csv(deck: Deck) -> pd.DataFrame:
+    # Datas que o CSV do deck possa ter são ignoradas: o progresso vem do armazenamento
+    df = pd.read_csv(deck.path, usecols=lambda column: column in CONTENT_COLUMNS)
+    # Decks antigos não têm a coluna id: o ID é a posição da linha
+    if ID not in df:
         df[ID] = df.index + 1
-        df[DATE_ADDED] = pd.to_datetime(datetime.now())
-        df[NEXT_APPEARANCE] = pd.to_datetime(datetime.now() - timedelta(days=1))
-        df[TAGS] = "simbolos"
-        
-        # Se existe um arquivo de progresso, carrega as datas de próxima aparição
-        if os.path.exists(FLASHCARDS_SYMBOLS_CSV):
-            progress_df = pd.read_csv(FLASHCARDS_SYMBOLS_CSV)
-            progress_df[DATE_ADDED] = pd.to_datetime(progress_df[DATE_ADDED])
-            progress_df[NEXT_APPEARANCE] = pd.to_datetime(progress_df[NEXT_APPEARANCE])
-            
-            # Atualiza as datas de próxima aparição baseado no progresso salvo
-            for _, progress_row in progress_df.iterrows():
-                mask = df[ID] == progress_row[ID]
-                if mask.any():
-                    df.loc[mask, NEXT_APPEARANCE] = progress_row[NEXT_APPEARANCE]
-                    df.loc[mask, DATE_ADDED] = progress_row[DATE_ADDED]
-        
+    if TAGS not in df:
+        df[TAGS] = deck.default_tag
+    return df[CONTENT_COLUMNS]
+
+
+def build_schedule(content_df: pd.DataFrame, progress_df: pd.DataFrame) -> pd.DataFrame:
+    """Monta o estado de agendamento (datas por card) na mesma ordem do conteúdo"""
+    schedule_df = pd.DataFrame({ID: content_df[ID]})
+    # Cards sem progresso salvo começam vencidos
+    for column, value in new_card_progress(datetime.now()).items():
+        schedule_df[column] = value
+    if not progress_df.empty:
+        schedule_df = merge_progress(schedule_df, progress_df)
+    return schedule_df
+
+
+def _typed_array(typecode: str, values) -> array:
+    typed = array(typecode)
+    typed.frombytes(np.ascontiguousarray(values, dtype=np.dtype(typecode)).tobytes())
+    return typed
+
+
+def _micros(dates: pd.Series) -> np.ndarray:
+    micros = pd.to_datetime(dates).to_numpy("datetime64[us]").astype(np.int64)
+    # Datas ausentes (NaT) viram a sentinela: o card fica vencido agora
+    micros[micros == NAT_MICROS] = MISSING_DATE_MICROS
+    return micros
+
+
+def build_card_schedule(content_df: pd.DataFrame, progress_df: pd.DataFrame) -> CardSchedule:
+    """Agendamento da sessão em arrays tipados, alinhados às linhas do deck compartilhado"""
+    schedule_df = build_schedule(content_df, progress_df)
+    return CardSchedule(
+        date_added=_typed_array("q", _micros(schedule_df[DATE_ADDED])),
+        next_appearance=_typed_array("q", _micros(schedule_df[NEXT_APPEARANCE])),
+        ease=_typed_array("f", schedule_df[EASE].astype(float)),
+        interval=_typed_array("i", schedule_df[INTERVAL].astype(int)),
+        repetitions=_typed_array("H", schedule_df[REPETITIONS].astype(int)),
+    )
+
+
+def load_all_flashcards(user: str = DEFAULT_USER, deck: Deck = DECKS[DEFAULT_DECK]):
+    # Carrega a base de dados das perguntas e respostas do deck
+    if os.path.exists(deck.path):
+        df = read_deck_content(deck)
+        # Carrega as datas de próxima aparição do progresso salvo do usuário
+        schedule_df = build_schedule(df, load_progress(progress_key(user, deck.name)))
+        df.insert(df.columns.get_loc(TAGS), DATE_ADDED, schedule_df[DATE_ADDED])
+        df.insert(df.columns.get_loc(TAGS), NEXT_APPEARANCE, schedule_df[NEXT_APPEARANCE])
+        for column in (EASE, INTERVAL, REPETITIONS):
+            df[column] = schedule_df[column]
         return df
     else:
         return get_empty_df()
 
 
+# Apenas os decks em uso ficam em memória, no máximo DECK_CACHE_ENTRIES por vez
+@st.cache_resource(max_entries=DECK_CACHE_ENTRIES, show_spinner=False)
+def _shared_deck_content(deck_name: str, signature: tuple) -> pd.DataFrame:
+    return read_deck_content(get_deck(deck_name))
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _shared_progress(user: str, signature: tuple) -> pd.DataFrame:
+    return load_progress(user)
+
+
+@st.cache_resource(max_entries=DECK_CACHE_ENTRIES, show_spinner=False)
+def _shared_id_index(deck_name: str, signature: tuple) -> dict:
+    return build_id_index(_shared_deck_content(deck_name, signature))
+
+
+@st.cache_resource(max_entries=DECK_CACHE_ENTRIES, show_spinner=False)
+def _shared_tag_index(deck_name: str, signature: tuple) -> dict:
+    return build_tag_index(_shared_deck_content(deck_name, signature))
+
+
+def get_current_deck() -> Deck:
+    """Deck escolhido na sessão (seletor ou ?deck= na URL)"""
+    return get_deck(st.session_state.get("deck") or st.query_params.get("deck") or DEFAULT_DECK)
+
+
+def deck_signature(deck: Deck) -> tuple:
+    return file_signature(deck.path)
+
+
+def get_deck_content(deck: Deck = None) -> pd.DataFrame:
+    """Conteúdo do deck compartilhado por todas as sessões (somente leitura).
+
+    É recarregado apenas quando o mtime ou o tamanho do CSV do deck mudam.
+    """
+    deck = deck or get_current_deck()
+    return _shared_deck_content(deck.name, deck_signature(deck))
+
+
+def get_tag_index(deck: Deck = None) -> dict:
+    """Índice tag -> posições dos cards do deck, construído uma vez por versão do CSV"""
+    deck = deck or get_current_deck()
+    return _shared_tag_index(deck.name, deck_signature(deck))
+
+
+def get_shared_progress(user: str = DEFAULT_USER) -> pd.DataFrame:
+    """Progresso salvo do usuário (somente leitura), recarregado quando o armazenamento muda"""
+    flush_reviews(user)
+    return _shared_progress(user, get_storage().signature(user))
+
+
 def concat_df(df1: pd.DataFrame, df2: pd.DataFrame) -> pd.DataFrame:
     # Se um dos DataFrames estiver vazio, retorna o outro
     if df1.empty:
@@ -67,45 +257,176 @@ def concat_df(df1: pd.DataFrame, df2: pd.DataFrame) -> pd.DataFrame:
 
 
 def get_due_flashcards(df: pd.DataFrame) -> pd.DataFrame:
-    # Retorna TODOS os flashcards para praticar todos os 84 símbolos a cada sessão
+    # Retorna apenas os flashcards cuja próxima aparição já chegou
     if len(df) > 0:
-        return df.copy()  # Retorna todos os flashcards, não apenas os "due"
+        return df[df[NEXT_APPEARANCE] <= pd.Timestamp(datetime.now())]
     else:
         return get_empty_df()
 
 
+MICROS_PER_DAY = 86_400_000_000
+
+
+def count_reviewed_today(schedule: CardSchedule, now: datetime) -> int:
+    """Quantos cards já foram revisados hoje (próxima aparição menos o intervalo)"""
+    # Visões numpy sobre os arrays da sessão, sem cópia
+    next_appearance = np.frombuffer(schedule.next_appearance, dtype=np.int64)
+    interval = np.frombuffer(schedule.interval, dtype=np.int32)
+    last_review_day = (next_appearance - interval.astype(np.int64) * MICROS_PER_DAY) // MICROS_PER_DAY
+    reviewed = (interval > 0) & (last_review_day == to_micros(now) // MICROS_PER_DAY)
+    return int(reviewed.sum())
+
+
+def tag_positions(tags: list) -> np.ndarray:
+    """Posições dos cards do deck da sessão com qualquer uma das tags"""
+    tag_index = get_tag_index(get_deck(st.session_state.deck_name))
+    selected = [tag_index[tag] for tag in tags if tag in tag_index]
+    return np.unique(np.concatenate(selected)) if selected else np.empty(0, dtype=np.int32)
+
+
 def initialize_question_queue():
-    """Inicializa uma fila de questões em ordem aleatória com TODOS os flashcards"""
-    all_questions = st.session_state.flashcards_df
-    if not all_questions.empty:
-        # Criar uma lista de IDs em ordem aleatória com TODOS os flashcards
-        question_ids = all_questions[ID].tolist()
-        random.shuffle(question_ids)
-        st.session_state.question_queue = question_ids
-        print(f"Inicializada fila com {len(question_ids)} questões")  # Debug
+    """Inicializa a fila de prioridade com os flashcards vencidos, até o limite diário.
+
+    Com tags escolhidas no filtro da sessão, só entram os cards com essas tags.
+    """
+    schedule = st.session_state.schedule
+    if len(schedule) > 0:
+        now = datetime.now()
+        limit = max(0, DAILY_REVIEW_LIMIT - count_reviewed_today(schedule, now))
+        next_appearance = np.frombuffer(schedule.next_appearance, dtype=np.int64)
+        now_micros = to_micros(now)
+        due_positions = np.flatnonzero(next_appearance <= now_micros)
+        tags = st.session_state.get("tag_filter")
+        if tags:
+            due_positions = np.intersect1d(due_positions, tag_positions(tags), assume_unique=True)
+        if len(due_positions) > limit:
+            # Só os `limit` vencimentos mais antigos, por seleção parcial; embaralhar antes sorteia os empates
+            due_positions = np.random.permutation(due_positions)
+            due_positions = due_positions[np.argpartition(next_appearance[due_positions], limit)[:limit]]
+        card_ids = st.session_state.deck_content[ID].to_numpy()[due_positions]
+        st.session_state.question_queue = ReviewQueue.due(
+            card_ids.tolist(), next_appearance[due_positions].tolist(), now_micros, limit
+        )
+        print(f"Inicializada fila com {len(st.session_state.question_queue)} questões")  # Debug
     else:
-        st.session_state.question_queue = []
+        st.session_state.question_queue = ReviewQueue()
+
+
+def build_id_index(df: pd.DataFrame) -> dict:
+    """Mapeia cada ID para a posição da sua linha no DataFrame"""
+    return {card_id: position for position, card_id in enumerate(df[ID].tolist())}
+
+
+def build_tag_index(df: pd.DataFrame) -> dict:
+    """Mapeia cada tag para as posições (ordenadas) dos cards que a têm.
+
+    Um card pode ter várias tags separadas por vírgula ou espaço.
+    """
+    tags = df[TAGS].fillna("").astype(str).str.split(TAG_SEPARATOR, regex=True).explode()
+    tags = tags[tags != ""]
+    positions = pd.Series(df.index.get_indexer(tags.index), index=tags.values)
+    return {tag: group.to_numpy(dtype=np.int32) for tag, group in positions.groupby(level=0)}
+
+
+def load_session_flashcards():
+    """Cria na sessão apenas o agendamento compacto; conteúdo e índices são compartilhados"""
+    deck = get_current_deck()
+    signature = deck_signature(deck)
+    content_df = _shared_deck_content(deck.name, signature)
+    user = get_current_user()
+    # Troca de deck ou usuário: as revisões do escopo anterior (e a sessão salva que
+    # depende delas) são gravadas antes que a sessão passe a outra chave de progresso
+    previous_key = st.session_state.get("progress_key")
+    if previous_key is not None and previous_key != progress_key(user, deck.name):
+        flush_reviews(previous_key)
+    st.session_state.user = user
+    st.session_state.deck_name = deck.name
+    st.session_state.progress_key = progress_key(user, deck.name)
+    st.session_state.deck_signature = signature
+    st.session_state.deck_content = content_df
+    st.session_state.card_index = _shared_id_index(deck.name, signature)
+    st.session_state.schedule = build_card_schedule(content_df, get_shared_progress(st.session_state.progress_key))
+    _bump_deck_version()
+
+
+def ensure_session_flashcards():
+    """Carrega o agendamento da sessão, recarregando-o se o deck, seu CSV ou o usuário mudaram"""
+    deck = get_current_deck()
+    if (
+        "schedule" not in st.session_state
+        or st.session_state.get("deck_name") != deck.name
+        or st.session_state.get("deck_signature") != deck_signature(deck)
+        or st.session_state.get("user") != get_current_user()
+    ):
+        load_session_flashcards()
+        metrics.increment("session_deck_loads")
+    else:
+        metrics.increment("session_deck_reuses")
+
+
+def get_card(card_id: int):
+    """Retorna o card (conteúdo e agendamento) pelo ID em tempo constante, ou None se não existir"""
+    position = st.session_state.card_index.get(card_id)
+    if position is None:
+        return None
+    content_df = st.session_state.deck_content
+    card = {column: content_df.iat[position, n] for n, column in enumerate(content_df.columns)}
+    card.update(st.session_state.schedule.get(position))
+    return card
+
+
+def set_card_progress(card_id: int, progress: dict):
+    """Atualiza o agendamento de um card usando o índice ID -> posição"""
+    st.session_state.schedule.set(st.session_state.card_index[card_id], progress)
 
 
 def get_next_question():
     """Retorna a próxima questão da fila randomizada"""
     # Se a fila estiver vazia, não há mais questões
-    if not hasattr(st.session_state, 'question_queue') or len(st.session_state.question_queue) == 0:
+    if not hasattr(st.session_state, 'question_queue'):
         return None
     
-    # Pegar o próximo ID da fila
-    next_id = st.session_state.question_queue[0]
-    
-    # Buscar a linha correspondente no DataFrame
-    df = st.session_state.flashcards_df
-    matching_rows = df[df[ID] == next_id]
-    
-    if not matching_rows.empty:
-        return matching_rows.iloc[0]
-    else:
+    queue = st.session_state.question_queue
+    while len(queue) > 0:
+        # Buscar a linha correspondente ao próximo ID da fila
+        row = get_card(queue.peek())
+        if row is not None:
+            return row
         # Se por algum motivo o ID não for encontrado, remover da fila e tentar o próximo
-        st.session_state.question_queue.pop(0)
-        return get_next_question() if len(st.session_state.question_queue) > 0 else None
+        queue.pop()
+    return None
+
+
+def get_next_due_date():
+    """Data em que a fila da sessão volta a ter cards, ou None se não houver cards para revisar.
+
+    Respeita o filtro de tags e, se o limite diário já foi usado, só conta a partir de amanhã.
+    """
+    schedule = st.session_state.schedule
+    next_appearance = np.frombuffer(schedule.next_appearance, dtype=np.int64)
+    tags = st.session_state.get("tag_filter")
+    if tags:
+        next_appearance = next_appearance[tag_positions(tags)]
+    if len(next_appearance) == 0:
+        return None
+    now = datetime.now()
+    return next_serving_date(from_micros(int(next_appearance.min())), count_reviewed_today(schedule, now), now)
+
+
+def review_card(card_id: int, difficulty: str) -> datetime:
+    """Aplica a resposta do usuário ao agendamento do card e registra a revisão.
+
+    Retorna a data da próxima aparição.
+    """
+    card = get_card(card_id)
+    now = datetime.now()
+    progress = apply_review(card, difficulty, now)
+    set_card_progress(card_id, progress)
+    _bump_deck_version()
+    event = review_event(card_id, difficulty, now, last_reviewed(card), progress[INTERVAL])
+    record_review(card_id, progress, st.session_state.progress_key, event)
+    metrics.increment(f"reviews_{difficulty}")
+    return progress[NEXT_APPEARANCE]
 
 
 def prepare_flashcard_df(
@@ -130,61 +451,253 @@ def prepare_flashcard_df(
     )
 
 
+SESSION_STATE_VERSION = 1
+
+
+def save_session():
+    """Salva a sessão de revisão em andamento sob o token da URL.
+
+    A gravação espera a fila write-behind, para que a sessão salva nunca pule
+    cards cujas revisões ainda não estão em disco.
+    """
+    store = get_session_store()
+    token = st.session_state.session_token
+    state = {
+        "version": SESSION_STATE_VERSION,
+        "user": st.session_state.user,
+        "deck": st.session_state.deck_name,
+        "tags": list(st.session_state.get("tag_filter", [])),
+        "queue": st.session_state.question_queue.snapshot(),
+        "stats": dict(st.session_state.session_stats),
+        "total": st.session_state.total_due_questions,
+        "hard": sorted(st.session_state.hard_symbols_this_session),
+        "session_type": st.session_state.session_type,
+    }
+    write_behind.after_flush(st.session_state.progress_key, token, lambda: store.save(token, state))
+
+
+def restore_session() -> bool:
+    """Restaura a sessão salva indicada por ?session= na URL, ou cria um token novo.
+
+    Retorna True se uma sessão foi restaurada.
+    """
+    token = st.query_params.get("session")
+    if token:
+        # Sessões salvas por este processo podem estar esperando a fila write-behind
+        flush_reviews()
+    state = get_session_store().load(token) if token else None
+    if (
+        state is None
+        or state.get("version") != SESSION_STATE_VERSION
+        or state["user"] != get_current_user()
+        or state["deck"] not in DECKS
+    ):
+        st.session_state.session_token = new_token()
+        st.query_params["session"] = st.session_state.session_token
+        return False
+
+    st.session_state.session_token = token
+    st.session_state.deck = state["deck"]
+    # Tags que saíram do deck desde que a sessão foi salva não são mais opções do filtro
+    tag_index = get_tag_index(get_deck(state["deck"]))
+    tags = [tag for tag in state["tags"] if tag in tag_index]
+    if tags:
+        st.session_state.tag_filter = tags
+    st.session_state.session_scope = (state["deck"], tuple(tags))
+    st.session_state.session_deck = state["deck"]
+    st.session_state.question_queue = ReviewQueue.restore(state["queue"])
+    st.session_state.session_stats = state["stats"]
+    st.session_state.total_due_questions = state["total"]
+    st.session_state.hard_symbols_this_session = set(state["hard"])
+    st.session_state.session_type = state["session_type"]
+    st.session_state.session_saved = True
+    return True
+
+
 def initialize_hard_questions_only():
     """Inicializa uma fila apenas com os símbolos marcados como difíceis"""
     if hasattr(st.session_state, 'hard_symbols_this_session') and len(st.session_state.hard_symbols_this_session) > 0:
         # Criar fila apenas com IDs dos símbolos difíceis em ordem aleatória
-        hard_question_ids = st.session_state.hard_symbols_this_session.copy()
+        hard_question_ids = list(st.session_state.hard_symbols_this_session)
         random.shuffle(hard_question_ids)
-        st.session_state.question_queue = hard_question_ids
+        st.session_state.question_queue = ReviewQueue.from_ids(hard_question_ids)
         print(f"Inicializada fila com {len(hard_question_ids)} símbolos difíceis")  # Debug
     else:
-        st.session_state.question_queue = []
+        st.session_state.question_queue = ReviewQueue()
+
+
+def history_dashboard(user: str = DEFAULT_USER):
+    """Estatísticas de todas as sessões do usuário, lidas dos agregados do histórico"""
+    history = get_review_history()
+    totals = history.totals(user)
+    if totals["reviews"] == 0:
+        return
+    st.markdown("## 🗂️ Histórico de Revisões")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Revisões no total", totals["reviews"])
+    with col2:
+        st.metric("Símbolos revisados", totals["cards"])
+    with col3:
+        st.metric("Taxa de difíceis", f"{totals['hard'] / totals['reviews'] * 100:.1f}%")
+
+    st.markdown("### 📅 Revisões por Dia")
+    daily_df = history.daily_stats(user)
+    st.bar_chart(daily_df.set_index("day")[["easy", "medium", "hard"]])
+
+    retention_df = history.retention(user)
+    if not retention_df.empty:
+        st.markdown("### 🧠 Retenção por Dias desde a Revisão Anterior")
+        st.line_chart(retention_df.set_index("elapsed_days")["retention"])
+
+    hardest_df = history.hardest_cards(user)
+    if not hardest_df.empty:
+        st.markdown("### 🎯 Símbolos Mais Difíceis")
+        content_df = st.session_state.deck_content
+        card_index = st.session_state.card_index
+        hardest_df[ANSWER] = [
+            content_df[ANSWER].iat[card_index[card_id]] if card_id in card_index else ""
+            for card_id in hardest_df["card_id"]
+        ]
+        hardest_df["hard_rate"] = (hardest_df["hard_rate"] * 100).round(1)
+        st.dataframe(
+            hardest_df.rename(
+                columns={"card_id": "Símbolo", ANSWER: "Resposta", "reviews": "Revisões", "hard": "Difícil", "hard_rate": "% Difícil"}
+            )[["Símbolo", "Resposta", "Revisões", "Difícil", "% Difícil"]],
+            hide_index=True,
+            use_container_width=True,
+        )
+
+
+@st.cache_resource(max_entries=DECK_CACHE_ENTRIES, show_spinner=False)
+def _shared_search_index(deck_name: str, signature: tuple) -> SearchIndex:
+    return _build_search_index(_shared_deck_content(deck_name, signature), get_deck(deck_name))
+
 
+def _build_search_index(df: pd.DataFrame, deck: Deck) -> SearchIndex:
+    texts = df[ANSWER].fillna("")
+    if TAGS in df:
+        texts = texts + " " + df[TAGS].fillna("")
+    # Em decks de texto a pergunta também é pesquisável; em decks de imagens é só um caminho
+    if not deck.images:
+        texts = df[QUESTION].fillna("") + " " + texts
+    return SearchIndex(texts.tolist())
+
+
+def get_search_index(deck: Deck = None) -> SearchIndex:
+    """Índice de busca do deck compartilhado, construído uma vez por versão do CSV do deck"""
+    deck = deck or get_current_deck()
+    return _shared_search_index(deck.name, deck_signature(deck))
+
+
+def _search_positions(text_search: str, scope: tuple, get_index: Callable) -> list:
+    """Posições dos resultados, guardadas na sessão para que a troca de página não refaça a busca"""
+    cached = st.session_state.get("search_results")
+    if cached is not None and cached[0] == (text_search, scope):
+        return cached[1]
+    positions = get_index().search(text_search)
+    st.session_state.search_results = ((text_search, scope), positions)
+    # Nova busca: voltar para a primeira página
+    st.session_state.search_page = 1
+    return positions
+
+
+def search(text_search: str, df: pd.DataFrame = None, page_size: int = SEARCH_PAGE_SIZE) -> Callable:
+    """Busca nos cards de df ou, sem df, no deck atual pelo índice compartilhado (bem mais rápido)"""
 
-def search(text_search: str, df: pd.DataFrame) -> Callable:
     def search_df():
-        if df.empty:
+        deck = get_current_deck()
+        if df is None:
+            signature = deck_signature(deck)
+            cards_df = _shared_deck_content(deck.name, signature)
+            scope = (deck.name, signature)
+            get_index = partial(_shared_search_index, deck.name, signature)
+        else:
+            # Um DataFrame avulso não tem índice compartilhado: é indexado na busca
+            cards_df = df
+            scope = ("df", id(df), len(df))
+            get_index = partial(_build_search_index, df, deck)
+        if cards_df.empty:
             st.warning("O DataFrame está vazio. Não há dados para pesquisar.")
             return
 
-        search_items = df[ANSWER].str.contains(text_search, case=False, na=False)
-        matching_rows = df[search_items]
-        if matching_rows.empty:
+        # Busca sem acentos e tolerante a erros de digitação, do mais relevante ao menos
+        positions = _search_positions(text_search, scope, get_index)
+        if not positions:
             st.info(f"Nenhum resultado encontrado para '{text_search}'.")
             return
 
+        # Apenas a página visível é renderizada e tem as imagens carregadas
+        n_pages = (len(positions) + page_size - 1) // page_size
+        page = st.number_input("Página", min_value=1, max_value=n_pages, step=1, key="search_page")
+        st.caption(f"{len(positions)} resultados — página {page} de {n_pages}")
+        page_positions = positions[(page - 1) * page_size : page * page_size]
+        matching_rows = cards_df.iloc[page_positions]
+
         for n_row, row in matching_rows.reset_index().iterrows():
             i = n_row % N_CARDS_PER_ROW
             if i == 0:
                 st.write("---")
                 cols = st.columns(N_CARDS_PER_ROW, gap="large")
             with cols[n_row % N_CARDS_PER_ROW]:
-                st.caption(f"Símbolo {int(row[ID])}")
-                st.image(row[QUESTION])
+                if deck.images:
+                    st.caption(f"Símbolo {int(row[ID])}")
+                    st.image(load_image(row[QUESTION]))
+                else:
+                    st.caption(f"Card {int(row[ID])}")
+                    st.markdown(f"**{row[QUESTION]}**")
                 with st.expander("Resposta"):
                     st.markdown(f"*{row[ANSWER].strip()}*")
 
     return search_df
 
 
-@st.cache_data(ttl=3600)
-def convert_df(df):
-    return df.to_csv().encode("utf-8")
+def get_deck_version() -> int:
+    """Versão do deck da sessão; muda a cada carga ou revisão, sem comparar conteúdo"""
+    return st.session_state.get("deck_version", 0)
+
+
+def _bump_deck_version():
+    st.session_state.deck_version = next(_deck_versions)
+
+
+def get_session_flashcards() -> pd.DataFrame:
+    """Deck da sessão com o agendamento atual, para visualização e exportação"""
+    schedule = st.session_state.schedule
+    return st.session_state.deck_content.assign(
+        **{
+            DATE_ADDED: np.frombuffer(schedule.date_added, dtype=np.int64).astype("datetime64[us]"),
+            NEXT_APPEARANCE: np.frombuffer(schedule.next_appearance, dtype=np.int64).astype("datetime64[us]"),
+            EASE: np.frombuffer(schedule.ease, dtype=np.float32).round(4),
+            INTERVAL: np.frombuffer(schedule.interval, dtype=np.int32),
+            REPETITIONS: np.frombuffer(schedule.repetitions, dtype=np.uint16),
+        }
+    )
+
+
+def _read_export(df: pd.DataFrame, export_format: str, version) -> bytes:
+    # O arquivo é gerado em blocos, mas o Streamlit carrega o download inteiro na
+    # memória de qualquer forma (mesmo recebendo um arquivo aberto)
+    with open(get_export_file(df, export_format, version), "rb") as f:
+        return f.read()
 
 
-def view_flashcards(df):
+def view_flashcards(df: pd.DataFrame, version):
+    """Tabela e download de df; `version` identifica o conteúdo de df (ex.: get_deck_version())"""
     if not df.empty:
         st.dataframe(
             df,
             use_container_width=True,
             column_order=[QUESTION, ANSWER, ID, DATE_ADDED, NEXT_APPEARANCE, TAGS],
         )
+        export_format = st.selectbox("Formato", available_formats(), key="export_format")
+        mime, extension = EXPORT_FORMATS[export_format]
+        # O arquivo só é gerado no clique, em blocos, e reaproveitado enquanto a versão não mudar
         st.download_button(
             label="Baixar Flashcards",
-            data=convert_df(df),
-            file_name="flashcards.csv",
-            mime="text/csv",
+            data=lambda: _read_export(df, export_format, version),
+            file_name=f"flashcards.{extension}",
+            mime=mime,
         )
     else:
         st.write("Nenhum flashcard disponível.")
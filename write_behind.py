@@ -0,0 +1,197 @@
+"""Fila write-behind das revisões: o clique não espera pela gravação em disco.
+
+As revisões ficam em memória, agrupadas por usuário e card (no progresso, várias
+revisões do mesmo card viram uma só; o histórico de analytics recebe todas), e
+uma thread em segundo plano as grava no backend de armazenamento quando FLASHCARDS_FLUSH_BATCH revisões se acumulam ou a cada
+FLASHCARDS_FLUSH_INTERVAL_S segundos. Também há gravação ao fim da sessão, antes
+de recarregar o progresso de um usuário e na saída do processo.
+
+Ações que dependem dessas revisões (como salvar a sessão retomável) são agendadas
+com after_flush() e só rodam depois que elas estão em disco.
+
+Com FLASHCARDS_WRITE_BEHIND=0 cada revisão é gravada na hora, como antes.
+"""
+import atexit
+import os
+import sys
+import threading
+
+import metrics
+from analytics import get_review_history
+from storage import get_storage
+
+WRITE_BEHIND_ENABLED = os.environ.get("FLASHCARDS_WRITE_BEHIND", "1") == "1"
+
+# Atraso máximo de uma revisão em memória e quantidade que força a gravação imediata
+FLUSH_INTERVAL_S = float(os.environ.get("FLASHCARDS_FLUSH_INTERVAL_S", 2))
+FLUSH_BATCH_SIZE = int(os.environ.get("FLASHCARDS_FLUSH_BATCH", 50))
+
+
+class WriteBehindQueue:
+    """Revisões pendentes ({usuário: {card_id: progresso}}) e a thread que as grava"""
+
+    def __init__(self, storage, history, interval_s: float = FLUSH_INTERVAL_S, batch_size: int = FLUSH_BATCH_SIZE):
+        self.storage = storage
+        self.history = history
+        self.interval_s = interval_s
+        self.batch_size = batch_size
+        self._pending = {}
+        # Eventos do histórico por usuário, sem agrupar
+        self._events = {}
+        # Ações a executar depois da gravação ({chave: (usuário, ação)}): uma só por chave,
+        # mesmo que a chave mude de usuário (ex.: a sessão trocou de deck)
+        self._actions = {}
+        self._count = 0
+        self._condition = threading.Condition()
+        # Serializa as gravações: quem chama flush() só retorna depois que as
+        # revisões já retiradas da fila por outra thread também estão em disco
+        self._write_lock = threading.Lock()
+        self._worker = None
+
+    def __len__(self) -> int:
+        with self._condition:
+            return self._count
+
+    def put(self, card_id: int, progress: dict, user: str, event: tuple = None):
+        with self._condition:
+            if event is not None:
+                self._events.setdefault(user, []).append(event)
+            reviews = self._pending.setdefault(user, {})
+            if card_id in reviews:
+                metrics.increment("coalesced_reviews")
+            else:
+                self._count += 1
+            reviews[card_id] = progress
+            self._start_worker()
+            if self._count >= self.batch_size:
+                self._condition.notify()
+
+    def put_after(self, user: str, key, action):
+        """Agenda action() para depois que as revisões já enfileiradas de `user` forem gravadas.
+
+        Substitui a ação pendente da mesma chave, ainda que agendada para outro usuário.
+        """
+        with self._condition:
+            self._actions[key] = (user, action)
+            self._start_worker()
+
+    def _start_worker(self):
+        # Chamado com self._condition adquirido
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._worker.start()
+
+    def _take(self, user: str = None) -> dict:
+        """Retira da fila {usuário: (revisões, eventos, ações)}; chamado com self._condition adquirido"""
+        action_users = {action_user for action_user, _ in self._actions.values()}
+        users = set(self._pending) | set(self._events) | action_users if user is None else {user}
+        taken = {}
+        for pending_user in users:
+            reviews = self._pending.pop(pending_user, {})
+            events = self._events.pop(pending_user, [])
+            actions = {
+                key: action for key, (action_user, action) in self._actions.items() if action_user == pending_user
+            }
+            for key in actions:
+                del self._actions[key]
+            if reviews or events or actions:
+                taken[pending_user] = (reviews, events, actions)
+                self._count -= len(reviews)
+        return taken
+
+    def _requeue(self, user: str, reviews: dict, events: list, actions: dict):
+        # Revisões mais novas do mesmo card, feitas durante a gravação, prevalecem
+        with self._condition:
+            pending = self._pending.setdefault(user, {})
+            for card_id, progress in reviews.items():
+                if card_id not in pending:
+                    pending[card_id] = progress
+                    self._count += 1
+            self._events[user] = events + self._events.get(user, [])
+            # Uma ação da mesma chave agendada durante a gravação é mais nova e prevalece
+            for key, action in actions.items():
+                self._actions.setdefault(key, (user, action))
+
+    def flush(self, user: str = None):
+        """Grava as revisões pendentes (de todos os usuários ou só de `user`)"""
+        with self._write_lock:
+            with self._condition:
+                taken = self._take(user)
+            pending_users = list(taken)
+            for index, pending_user in enumerate(pending_users):
+                reviews, events, actions = taken[pending_user]
+                try:
+                    if reviews:
+                        with metrics.span("flush_reviews"):
+                            self.storage.record_reviews(reviews, pending_user)
+                        metrics.increment("review_saves", len(reviews))
+                        reviews = {}
+                    if events:
+                        with metrics.span("flush_history"):
+                            self.history.record(events, pending_user)
+                        events = []
+                    for key in list(actions):
+                        actions[key]()
+                        del actions[key]
+                except Exception:
+                    # O que já foi gravado não volta para a fila
+                    self._requeue(pending_user, reviews, events, actions)
+                    for failed_user in pending_users[index + 1 :]:
+                        self._requeue(failed_user, *taken[failed_user])
+                    raise
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._count >= self.batch_size, timeout=self.interval_s)
+            try:
+                self.flush()
+            except Exception as e:
+                # As revisões voltaram para a fila; nova tentativa no próximo ciclo
+                metrics.increment("flush_errors")
+                print(f"Erro ao gravar revisões: {e}", file=sys.stderr)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_write_behind() -> WriteBehindQueue:
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue(get_storage(), get_review_history())
+            atexit.register(_queue.flush)
+        return _queue
+
+
+def enqueue_review(card_id: int, progress: dict, user: str, event: tuple = None):
+    """Agenda a gravação de uma revisão e do seu evento no histórico.
+
+    Com o write-behind desativado, grava na hora.
+    """
+    if WRITE_BEHIND_ENABLED:
+        get_write_behind().put(card_id, progress, user, event)
+    else:
+        with metrics.span("record_review"):
+            get_storage().record_review(card_id, progress, user)
+        metrics.increment("review_saves")
+        if event is not None:
+            get_review_history().record([event], user)
+
+
+def after_flush(user: str, key, action):
+    """Executa action() depois que as revisões de `user` enfileiradas até agora forem gravadas.
+
+    Para cada chave, só a ação mais recente roda. Com o write-behind desativado, roda na hora.
+    """
+    if WRITE_BEHIND_ENABLED:
+        get_write_behind().put_after(user, key, action)
+    else:
+        action()
+
+
+def flush(user: str = None):
+    """Grava imediatamente as revisões pendentes"""
+    if _queue is not None:
+        _queue.flush(user)